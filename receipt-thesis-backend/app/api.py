@@ -1,42 +1,50 @@
 # app/api.py
 from __future__ import annotations
 
-import os, re, uuid, asyncio, math, time, logging, json
+import os, re, copy, uuid, asyncio, math, time, logging, json, hashlib, heapq, threading, base64
+from collections import Counter, OrderedDict
+import functools
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 from datetime import date as _date, datetime as _datetime
 from jose import jwt
 from jose.backends.cryptography_backend import CryptographyRSAKey
 import httpx
 
 import numpy as np
-import pandas as pd
-import cv2
 from math import isnan, isinf
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Request
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, field_validator
 from joblib import load, dump
+from sqlalchemy import select, update, insert, bindparam
+from sqlalchemy.orm import Session
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import SGDClassifier
 
 # --- project locals ---
-from .ocr import ocr_crop, ocr_amount_from_crop
+from .ocr import ocr_crop, ocr_amount_from_crop, decode_bytes_to_bgr
 from .ocr_google import GCV_ENABLED
-from .ocr_paddle_vl import paddle_vl_text
+from .ocr_paddle_vl import paddle_vl_text_batch, warmup as warmup_paddle_vl
+from .ocr_space import aclose_client as ocr_space_aclose
 from .parser import parse_fields, extract_date, parse_fields_from_ocr  # improved total/date parsing
 from .ph_rules import rule_category, normalize_store_name, correct_store_name
-from .detect import detect_fields
+from .detect import detect_fields, detect_fields_batch, warmup as warmup_detector
 from .db import (
-    init_db, insert_receipt, list_receipts,
+    init_db, insert_receipt, list_receipts, iter_receipts,
     stats_by_category, stats_by_month, stats_summary,
     top_merchants_current_month, weekday_spend,
     rolling_30_day_spend, low_confidence_receipts,
-    SessionLocal, Receipt, ReceiptCorrection, CustomLabel,
+    SessionLocal, get_db, Receipt, ReceiptCorrection, CustomLabel,
     create_custom_label, list_custom_labels, get_custom_label,
-    update_custom_label, delete_custom_label, increment_label_usage,
+    update_custom_label, delete_custom_label, increment_label_usage, add_label_usage,
+    insert_feedback, iter_feedback, import_feedback_csv, list_corrections, adjust_daily_rollup,
+    STATS_ASYNC, async_engine,
 )
 from .ocr_strategies import (
     OCRContext,
@@ -44,10 +52,21 @@ from .ocr_strategies import (
     OCRSpaceStrategy,
     GoogleVisionStrategy,
     PaddleVLStrategy,
+    run_local_ocr,
 )
 
 from dotenv import load_dotenv
 
+try:  # optional: C JSON encoder for the list endpoints
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:  # optional: Brotli response compression
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # pragma: no cover - optional dependency
+    BrotliMiddleware = None
+
 load_dotenv()  # load .env if present
 
 # ================== helpers for floats ==================
@@ -62,12 +81,41 @@ def _clean_num(x):
     except Exception:
         return None
 
+# ================== memoized text parsing ==================
+@lru_cache(maxsize=512)
+def _parse_fields_cached(text: str) -> tuple[Optional[str], Optional[float], Optional[str]]:
+    """parse_fields memoized by OCR text; results are immutable so sharing is safe."""
+    return parse_fields(text)
+
 # ================== OCR.space config ==================
-OCR_SPACE_URL = os.getenv("OCR_SPACE_URL", "https://api.ocr.space/parse/image")
-OCR_SPACE_API_KEY = os.getenv("OCR_SPACE_API_KEY", "")
 OCR_SPACE_ENABLED = os.getenv("OCR_SPACE_ENABLED", "false").lower() == "true"
 TESSERACT_ENABLED = os.getenv("TESSERACT_ENABLED", "true").lower() == "true"
 PADDLE_VL_ENABLED = os.getenv("PADDLE_VL_ENABLED", "false").lower() == "true"
+# Load PaddleOCR-VL at startup instead of on the first upload (only when it is enabled)
+PADDLE_VL_WARMUP = os.getenv("PADDLE_VL_WARMUP", "true").lower() == "true"
+
+# Skip the full-page engines when YOLO crops yield store, total and date with at least
+# this box confidence each (opt-in: trades recall on messy receipts for latency/quota).
+YOLO_FAST_PATH = os.getenv("YOLO_FAST_PATH", "false").lower() == "true"
+YOLO_FAST_PATH_MIN_CONF = float(os.getenv("YOLO_FAST_PATH_MIN_CONF", "0.5"))
+# Run one blank frame through YOLO at startup so the first upload is not the cold one
+YOLO_WARMUP = os.getenv("YOLO_WARMUP", "true").lower() == "true"
+# Concurrent uploads share one YOLO predict: up to YOLO_BATCH_MAX frames that arrive
+# within YOLO_BATCH_WAIT_MS of the first are run as a single batch (.pt weights only;
+# exported engine/ONNX models are static batch-1 and detect.py runs them per image).
+YOLO_BATCH_MAX = max(1, int(os.getenv("YOLO_BATCH_MAX", "8")))
+YOLO_BATCH_WAIT_MS = float(os.getenv("YOLO_BATCH_WAIT_MS", "10"))
+
+# PaddleOCR-VL prompts for refining each YOLO crop
+_PADDLE_CROP_PROMPTS = {
+    "Merchant": "Extract the store or merchant name from this receipt snippet.",
+    "Total": "Extract the total amount the customer needs to pay. Return only the numeric amount with currency if present.",
+    "Date": "Extract the transaction or receipt date in YYYY-MM-DD format if possible.",
+}
+
+# Which gaps trigger the Google Vision fallback. Bits (LSB first): tesseract store/total/date,
+# paddle store/total/date, tesseract mean_conf < 55. Default: any of them.
+_VISION_TRIGGER_MASK = 0b1111111
 
 _ocr_strategies = {}
 if TESSERACT_ENABLED:
@@ -78,27 +126,36 @@ _ocr_strategies["paddle_vl"] = PaddleVLStrategy(enabled=PADDLE_VL_ENABLED)
 
 JOBS: dict[str, dict] = {}
 JOBS_LOCK = asyncio.Lock()
+_JOB_HEAP: list[tuple[float, str]] = []  # (updated_at, job_id) of finished jobs, min-heap
+_TERMINAL_STATUSES = frozenset({"completed", "failed"})
+# In-memory inputs (e.g. upload bytes) kept out of JOBS so job records stay small/serializable
+_JOB_PAYLOAD: dict[str, dict] = {}
 
 OCR_STRATEGY_CONTEXT = OCRContext(_ocr_strategies)
 
+# Global cap on in-flight OCR engine calls across all jobs (local + remote)
+OCR_CONCURRENCY = max(1, int(os.getenv("OCR_CONCURRENCY", "8")))
+_OCR_SEM = asyncio.Semaphore(OCR_CONCURRENCY)
+
 MAX_JOBS = 200
 
 
+async def _run_ocr(name: str, **kwargs):
+    """Run an OCR strategy while holding a slot in the global concurrency cap."""
+    async with _OCR_SEM:
+        return await OCR_STRATEGY_CONTEXT.run(name, **kwargs)
+
+
 async def _prune_jobs_locked():
-    if len(JOBS) <= MAX_JOBS:
-        return
-    removable = [
-        job for job in JOBS.values()
-        if job.get("status") in {"completed", "failed"}
-    ]
-    removable.sort(key=lambda j: j.get("updated_at", j.get("created_at", 0)))
-    for job in removable:
-        if len(JOBS) <= MAX_JOBS:
-            break
-        JOBS.pop(job["id"], None)
+    # Oldest finished jobs first; entries whose job changed since the push are stale
+    while len(JOBS) > MAX_JOBS and _JOB_HEAP:
+        ts, job_id = heapq.heappop(_JOB_HEAP)
+        job = JOBS.get(job_id)
+        if job and job.get("status") in _TERMINAL_STATUSES and job.get("updated_at") == ts:
+            JOBS.pop(job_id, None)
 
 
-async def _register_job(user_id: str, filename: str) -> dict:
+async def _register_job(user_id: str, filename: str, payload: Optional[dict] = None) -> dict:
     now = time.time()
     job_id = uuid.uuid4().hex
     job = {
@@ -115,6 +172,8 @@ async def _register_job(user_id: str, filename: str) -> dict:
     }
     async with JOBS_LOCK:
         JOBS[job_id] = job
+        if payload:
+            _JOB_PAYLOAD[job_id] = payload
         await _prune_jobs_locked()
     return job
 
@@ -126,6 +185,8 @@ async def _update_job(job_id: str, **changes) -> Optional[dict]:
             return None
         job.update(changes)
         job["updated_at"] = time.time()
+        if job.get("status") in _TERMINAL_STATUSES:
+            heapq.heappush(_JOB_HEAP, (job["updated_at"], job_id))
         return job.copy()
 
 
@@ -135,20 +196,26 @@ async def _get_job(job_id: str) -> Optional[dict]:
         return job.copy() if job else None
 
 
+async def _crop_ocr(func, img_bgr: np.ndarray, det: Optional[dict], **kwargs):
+    """Run a blocking crop-OCR helper on a YOLO detection in a worker thread."""
+    if det is None:
+        return None
+    async with _OCR_SEM:
+        return await asyncio.to_thread(func, img_bgr, det["box"], **kwargs)
+
+
 def _public_job(job: dict) -> dict:
     safe = job.copy()
     safe.pop("user_id", None)
     return safe
 
-def _crop_to_bytes(img_bgr: np.ndarray, box: tuple[int, int, int, int]) -> bytes | None:
+def _crop_to_ndarray(img_bgr: np.ndarray, box: tuple[int, int, int, int]) -> np.ndarray | None:
+    """Zero-copy view of the box region, or None if it is empty."""
     x1, y1, x2, y2 = box
     crop = img_bgr[y1:y2, x1:x2]
     if crop.size == 0:
         return None
-    ok, encoded = cv2.imencode(".jpg", crop)
-    if not ok:
-        return None
-    return encoded.tobytes()
+    return crop
 
 # ================== Supabase Auth (JWT) ==================
 
@@ -156,22 +223,51 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL")
 SUPABASE_PROJECT_REF= os.getenv("SUPABASE_PROJECT_REF")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-_JWKS_CACHE: Optional[dict] = None  
-_USER_CACHE: dict[str, tuple[dict, float]] = {}
+_JWKS_CACHE: Optional[dict] = None  # {"map": {kid: CryptographyRSAKey}, "fetched_at": ts}
+_JWKS_TTL = 3600  # seconds before the key set is refetched
+_JWKS_MIN_REFRESH = 60  # floor between forced refetches for unknown kids
+_USER_CACHE: "OrderedDict[bytes, tuple[dict, float]]" = OrderedDict()
+_USER_CACHE_MAX = int(os.getenv("USER_CACHE_MAX", "10000"))  # LRU cap on verified tokens
+_USER_INFLIGHT: dict[bytes, asyncio.Future] = {}  # token digest -> verification in progress
 _CACHE_GRACE = 10  # seconds to subtract from token expiry when caching
 _CACHE_DEFAULT_TTL = 300  # fallback cache TTL (5 minutes)
 
-async def _get_jwks():
+_SUPABASE_HTTP: Optional[httpx.AsyncClient] = None
+
+
+def _supabase_http() -> httpx.AsyncClient:
+    """Pooled client for Supabase auth calls (JWKS + /auth/v1/user)."""
+    global _SUPABASE_HTTP
+    if _SUPABASE_HTTP is None or _SUPABASE_HTTP.is_closed:
+        _SUPABASE_HTTP = httpx.AsyncClient(timeout=10)
+    return _SUPABASE_HTTP
+
+async def _get_jwks(force: bool = False) -> Optional[dict]:
+    """
+    Return a {kid: CryptographyRSAKey} map built once per fetch.
+    Refetched after _JWKS_TTL or when force=True (e.g. unknown kid after key rotation).
+    """
     global _JWKS_CACHE
     if not SUPABASE_JWKS_URL:
         return None
-    if _JWKS_CACHE is None:
+    now = time.time()
+    age = now - _JWKS_CACHE["fetched_at"] if _JWKS_CACHE is not None else None
+    if age is None or age > _JWKS_TTL or (force and age > _JWKS_MIN_REFRESH):
         headers = {"apikey": SUPABASE_ANON_KEY} if SUPABASE_ANON_KEY else {}
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(SUPABASE_JWKS_URL, headers=headers)
-            resp.raise_for_status()
-            _JWKS_CACHE = resp.json()
-    return _JWKS_CACHE
+        resp = await _supabase_http().get(SUPABASE_JWKS_URL, headers=headers)
+        resp.raise_for_status()
+        data = resp.json()
+        key_map = {}
+        for jwk in data.get("keys", []):
+            kid = jwk.get("kid")
+            if not kid:
+                continue
+            try:
+                key_map[kid] = CryptographyRSAKey(jwk, jwk.get("alg") or "RS256")
+            except Exception:
+                continue  # non-RSA or malformed key
+        _JWKS_CACHE = {"map": key_map, "fetched_at": now}
+    return _JWKS_CACHE["map"]
 
 def _get_kid(token: str) -> Optional[str]:
     try:
@@ -191,8 +287,7 @@ async def _fetch_supabase_user(token: str) -> dict:
         "Authorization": f"Bearer {token}",
         "apikey": SUPABASE_ANON_KEY,
     }
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(user_url, headers=headers)
+    resp = await _supabase_http().get(user_url, headers=headers)
 
     if resp.status_code != 200:
         detail = "Supabase token invalid"
@@ -220,24 +315,33 @@ async def _fetch_supabase_user(token: str) -> dict:
     }
     return payload
 
-def _cache_lookup(token: str) -> Optional[dict]:
-    entry = _USER_CACHE.get(token)
+def _token_key(token: str) -> bytes:
+    # Short digest so the cache never holds raw bearer tokens
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _cache_lookup(key: bytes) -> Optional[dict]:
+    entry = _USER_CACHE.get(key)
     if not entry:
         return None
     payload, expires_at = entry
     if expires_at is None or expires_at > time.time():
+        _USER_CACHE.move_to_end(key)
         return payload
-    _USER_CACHE.pop(token, None)
+    _USER_CACHE.pop(key, None)
     return None
 
-def _cache_store(token: str, payload: dict):
+def _cache_store(key: bytes, payload: dict):
     exp_claim = payload.get("exp")
     ttl = _CACHE_DEFAULT_TTL
     now = time.time()
     if isinstance(exp_claim, (int, float)):
-        ttl = max(0, exp_claim - now - _CACHE_GRACE)
-    expires_at = now + ttl if ttl > 0 else now + _CACHE_DEFAULT_TTL
-    _USER_CACHE[token] = (payload, expires_at)
+        ttl = exp_claim - now - _CACHE_GRACE
+    if ttl <= 0 or _USER_CACHE_MAX <= 0:
+        return  # about to expire (or caching disabled): never outlive the token
+    _USER_CACHE[key] = (payload, now + ttl)
+    _USER_CACHE.move_to_end(key)
+    while len(_USER_CACHE) > _USER_CACHE_MAX:
+        _USER_CACHE.popitem(last=False)
 
 async def get_current_user(request: Request) -> dict:
     auth = request.headers.get("authorization")
@@ -245,32 +349,45 @@ async def get_current_user(request: Request) -> dict:
         raise HTTPException(status_code=401, detail="Missing Bearer token")
     token = auth.split(" ", 1)[1].strip()
 
-    cached = _cache_lookup(token)
+    cache_key = _token_key(token)
+    cached = _cache_lookup(cache_key)
     if cached is not None:
         return cached
 
+    # A cold dashboard load fires several requests with the same token at once;
+    # let them share one verification instead of each doing RSA/JWKS/Supabase work.
+    task = _USER_INFLIGHT.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(_verify_token(token, cache_key))
+        _USER_INFLIGHT[cache_key] = task
+        task.add_done_callback(lambda _t: _USER_INFLIGHT.pop(cache_key, None))
+    return await asyncio.shield(task)
+
+
+async def _verify_token(token: str, cache_key: bytes) -> dict:
     payload: Optional[dict] = None
 
-    try:
-        jwks = await _get_jwks()
-    except Exception:
-        jwks = None
-
-    if jwks and jwks.get("keys"):
-        kid = _get_kid(token)
-        if kid:
-            jwk = next((k for k in jwks["keys"] if k.get("kid") == kid), None)
-            if jwk is not None:
-                public_key = CryptographyRSAKey(jwk)
-                try:
-                    payload = jwt.decode(
-                        token,
-                        public_key,
-                        algorithms=["RS256"],
-                        options={"verify_aud": False},
-                    )
-                except Exception:
-                    payload = None
+    kid = _get_kid(token)
+    public_key = None
+    if kid:
+        try:
+            key_map = await _get_jwks()
+            if key_map is not None and kid not in key_map:
+                key_map = await _get_jwks(force=True)
+            public_key = key_map.get(kid) if key_map else None
+        except Exception:
+            public_key = None
+
+    if public_key is not None:
+        try:
+            payload = jwt.decode(
+                token,
+                public_key,
+                algorithms=["RS256"],
+                options={"verify_aud": False},
+            )
+        except Exception:
+            payload = None
 
     if payload is None:
         payload = await _fetch_supabase_user(token)
@@ -278,7 +395,7 @@ async def get_current_user(request: Request) -> dict:
     if payload is None:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    _cache_store(token, payload)
+    _cache_store(cache_key, payload)
 
     return payload  # has "sub", "email", etc.
 
@@ -292,18 +409,56 @@ VPATH = MODELS / "vectorizer.joblib"
 CPATH = MODELS / "classifier.joblib"
 FPATH = DATA / "feedback.csv"
 
+# Keep a copy of each upload under data/raw_images (disable to process purely in memory)
+PERSIST_UPLOADS = os.getenv("PERSIST_UPLOADS", "true").lower() == "true"
+
 # Public list for validation/UI; classifier classes_ may differ at runtime
 CATS_PUBLIC = ["Utilities", "Food", "Groceries", "Transportation", "Health & Wellness", "Others"]
+CATS_PUBLIC_SET = frozenset(CATS_PUBLIC)  # O(1) membership checks on edit/feedback
+_CATS_PUBLIC_TUPLE = tuple(CATS_PUBLIC)
 
 app = FastAPI(title="Receipt Thesis Backend", version="1.4.0")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# JSON lists/stats compress 5-10x; Brotli (gzip fallback built in) when installed
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=1024, quality=4)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # ------------- lazy-load model (if present) -------------
-vectorizer: Optional[TfidfVectorizer] = load(VPATH) if VPATH.exists() else None
+# Vectorizer is read-only at runtime, so its arrays can be memory-mapped and shared
+# across workers; the classifier stays in RAM and /retrain_incremental swaps in a refit copy.
+vectorizer: Optional[TfidfVectorizer] = load(VPATH, mmap_mode="r") if VPATH.exists() else None
 clf: Optional[SGDClassifier] = load(CPATH) if CPATH.exists() else None
+# Fortran-ordered coef_ keeps X @ coef_.T copy-free (older artifacts are saved C-ordered)
+if clf is not None:
+    clf.coef_ = np.asfortranarray(clf.coef_)
+
+
+def _model_classes(model) -> tuple[str, ...]:
+    """String class labels of a fitted classifier (empty if unavailable)."""
+    if model is not None and hasattr(model, "classes_"):
+        return tuple(map(str, model.classes_))
+    return ()
+
+
+_CLF_CLASSES: tuple[str, ...] = _model_classes(clf)
+
+
+def _ml_predict(text: str) -> tuple[str, np.ndarray, tuple[str, ...]]:
+    """Return (label, probabilities, class labels) for text; requires a loaded model."""
+    X = vectorizer.transform([text])
+    proba = clf.predict_proba(X)[0]
+    # Use model's own classes_ to avoid mismatch with CATS_PUBLIC
+    cls_list = _CLF_CLASSES or _CATS_PUBLIC_TUPLE
+    return cls_list[int(proba.argmax())], proba, cls_list
+
+_EDITABLE_FIELDS = frozenset({"store", "date", "total", "category"})
+_OCR_FIELDS = frozenset({"store", "date", "total"})  # corrections logged as change_type="ocr"
 
 def _serialize_value(value):
     if isinstance(value, (_date, _datetime)):
@@ -312,75 +467,57 @@ def _serialize_value(value):
         return None
     return str(value)
 
-# ================== OCR.space helper ===================
-async def ocr_space_bytes(img_bytes: bytes, filename: str = "receipt.jpg", lang: str = "eng") -> dict:
-    """
-    Call OCR.space with image bytes. Returns:
-      {"ok": bool, "text": str, "raw": dict|None, "error": str|None, "http": int|None}
-    """
-    if not OCR_SPACE_ENABLED or not OCR_SPACE_API_KEY:
-        return {"ok": False, "text": "", "raw": None, "error": "disabled_or_no_key", "http": None}
-
-    data = {
-        "language": lang,
-        "isOverlayRequired": False,
-        "OCREngine": 2,
-        "scale": True,
-        "isTable": False
-    }
-    headers = {"apikey": OCR_SPACE_API_KEY}
-    files = {"file": (filename, img_bytes, "application/octet-stream")}
-
+# ================== reconcile fields ===================
+def _close_amt(a, b) -> bool:
+    if a is None or b is None:
+        return False
     try:
-        async with httpx.AsyncClient(timeout=90) as client:
-            r = await client.post(OCR_SPACE_URL, data=data, headers=headers, files=files)
-            http_code = r.status_code
-            j = r.json()
-    except Exception as e:
-        return {"ok": False, "text": "", "raw": None, "error": f"network:{e}", "http": None}
+        return abs(float(a) - float(b)) <= 0.01
+    except Exception:
+        return False
 
-    text = ""
-    if isinstance(j, dict) and j.get("ParsedResults"):
-        text = "\n".join(pr.get("ParsedText", "") for pr in j["ParsedResults"]).strip()
 
-    err = None
-    if isinstance(j, dict) and j.get("IsErroredOnProcessing"):
-        err = f"api:{j.get('ErrorMessage') or j.get('ErrorDetails') or 'unknown'}"
+def _store_key(store: Optional[str]) -> Optional[str]:
+    return store.strip().upper() if store else None
+
+
+# Candidate scoring weights: field presence, engine trust bonus
+_W_STORE, _W_TOTAL, _W_DATE = 2.0, 3.5, 1.2
+_SOURCE_BONUS = {"ocr_space": 0.25, "paddle_vl": 0.5}
+
+
+def _candidate_score(cand: dict) -> float:
+    return (
+        (_W_STORE if cand["store"] else 0.0)
+        + (_W_TOTAL if cand["total"] is not None else 0.0)
+        + (_W_DATE if cand["date"] else 0.0)
+        + min(cand.get("confidence") or 0.0, 100.0) / 40.0
+        + max(0.0, 3.0 - cand["priority"])
+        + _SOURCE_BONUS.get(cand["source"], 0.0)
+    )
 
-    ok = bool(text) and not j.get("IsErroredOnProcessing", False)
-    return {"ok": ok, "text": text or "", "raw": j, "error": err, "http": http_code}
 
-# ================== reconcile fields ===================
 def resolve_fields(
     tess_rec: dict,
     tess_conf: Optional[float],
     ocrs: dict,
     vision: dict,
     paddle: dict | None = None,
+    tess_parsed: tuple | None = None,
 ) -> tuple[Optional[str], Optional[float], Optional[str], str]:
     """
     Compare outputs from Tesseract, OCR.space, and (optionally) Google Vision.
     Return the best (store, total, date, source_tag).
+    tess_parsed: parse_fields_from_ocr(tess_rec) if the caller already computed it.
     """
-
-    def close_amt(a, b):
-        if a is None or b is None:
-            return False
-        try:
-            return abs(float(a) - float(b)) <= 0.01
-        except Exception:
-            return False
-
-    def eq_store(a, b):
-        if not a or not b:
-            return False
-        return a.strip().upper() == b.strip().upper()
-
     candidates = []
 
     tess_text = tess_rec.get("text", "") if isinstance(tess_rec, dict) else str(tess_rec or "")
-    t_store, t_total, t_date = parse_fields_from_ocr(tess_rec if isinstance(tess_rec, dict) else {"text": tess_text})
-    fb_store, fb_total, fb_date = parse_fields(tess_text)
+    if tess_parsed is not None:
+        t_store, t_total, t_date = tess_parsed
+    else:
+        t_store, t_total, t_date = parse_fields_from_ocr(tess_rec if isinstance(tess_rec, dict) else {"text": tess_text})
+    fb_store, fb_total, fb_date = _parse_fields_cached(tess_text)
     t_store = t_store or fb_store
     t_total = t_total if t_total is not None else fb_total
     t_date = t_date or fb_date
@@ -395,7 +532,7 @@ def resolve_fields(
     })
 
     if ocrs.get("ok") and ocrs.get("text"):
-        s_store, s_total, s_date = parse_fields(ocrs["text"])
+        s_store, s_total, s_date = _parse_fields_cached(ocrs["text"])
         candidates.append({
             "source": "ocr_space",
             "store": s_store,
@@ -406,7 +543,7 @@ def resolve_fields(
         })
 
     if vision.get("ok") and vision.get("text"):
-        v_store, v_total, v_date = parse_fields(vision["text"])
+        v_store, v_total, v_date = _parse_fields_cached(vision["text"])
         v_conf = None
         try:
             v_conf = vision.get("info", {}).get("confidence")
@@ -435,35 +572,29 @@ def resolve_fields(
     if not candidates:
         return None, None, None, "unknown"
 
-    def score(cand):
-        score = 0.0
-        if cand["store"]:
-            score += 2.0
-        if cand["total"] is not None:
-            score += 3.5
-        if cand["date"]:
-            score += 1.2
-        score += min(cand.get("confidence") or 0.0, 100.0) / 40.0
-        score += max(0.0, 3.0 - cand["priority"])
-        if cand["source"] == "ocr_space":
-            score += 0.25
-        if cand["source"] == "paddle_vl":
-            score += 0.5
-        return score
-
-    best = max(candidates, key=score)
+    # Normalize each store once instead of on every pairwise comparison
+    for cand in candidates:
+        cand["store_key"] = _store_key(cand["store"])
+
+    # Score each candidate exactly once; first max wins ties (same as max(key=...))
+    scores = [_candidate_score(c) for c in candidates]
+    best_idx = max(range(len(candidates)), key=scores.__getitem__)
+    best = candidates[best_idx]
 
     # Detect consensus (any other candidate matching best)
     consensus = False
-    for cand in candidates:
-        if cand is best:
-            continue
-        same_store = eq_store(cand["store"], best["store"])
-        same_total = close_amt(cand["total"], best["total"])
-        same_date = (cand["date"] == best["date"]) and best["date"] is not None
-        if same_store and same_total and same_date:
-            consensus = True
-            break
+    if best["date"] is not None:
+        for idx, cand in enumerate(candidates):
+            if idx == best_idx:
+                continue
+            if (
+                cand["date"] == best["date"]
+                and best["store_key"] is not None
+                and cand["store_key"] == best["store_key"]
+                and _close_amt(cand["total"], best["total"])
+            ):
+                consensus = True
+                break
 
     source_tag = "consensus" if consensus else best["source"]
 
@@ -488,16 +619,98 @@ class TextIn(BaseModel):
 
 class ReceiptUpdate(BaseModel):
     store: str | None = None
-    date: str | None = None          # ISO YYYY-MM-DD
+    date: _date | None = None        # ISO YYYY-MM-DD, parsed by pydantic-core (422 if malformed)
     total: float | None = None
     category: str | None = None      # validated in UI; not enforced here
 
+    @field_validator("date", mode="before")
+    @classmethod
+    def _blank_date_is_none(cls, v):
+        return None if v == "" else v
+
+    @field_validator("total")
+    @classmethod
+    def _non_finite_total_is_none(cls, v):
+        return _nan_none(v)  # never persist NaN/inf, so reads need no per-row cleanup
+
+@app.on_event("startup")
+async def _warm_detector():
+    if not YOLO_WARMUP:
+        return
+    try:
+        await asyncio.to_thread(warmup_detector)
+    except Exception:
+        logging.exception("YOLO warm-up failed; the first upload will load the model")
+
+@app.on_event("startup")
+async def _warm_paddle_vl():
+    if not (PADDLE_VL_ENABLED and PADDLE_VL_WARMUP):
+        return
+    try:
+        await asyncio.to_thread(warmup_paddle_vl)
+    except Exception:
+        logging.exception("PaddleOCR-VL warm-up failed; the first upload will load the pipeline")
+
+# ================== YOLO micro-batching ==================
+_DETECT_Q: asyncio.Queue = asyncio.Queue()
+_detect_worker_task: Optional[asyncio.Task] = None
+
+
+async def _detect(img) -> list[dict]:
+    """detect_fields off the event loop, batched with any other uploads in flight."""
+    if _detect_worker_task is None or YOLO_BATCH_MAX == 1:
+        return await asyncio.to_thread(detect_fields, img)
+    fut = asyncio.get_running_loop().create_future()
+    _DETECT_Q.put_nowait((img, fut))
+    return await fut
+
+
+async def _detect_worker():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _DETECT_Q.get()]
+        deadline = loop.time() + YOLO_BATCH_WAIT_MS / 1000
+        while len(batch) < YOLO_BATCH_MAX:
+            try:
+                batch.append(await asyncio.wait_for(_DETECT_Q.get(), deadline - loop.time()))
+            except asyncio.TimeoutError:
+                break
+        try:
+            results = await asyncio.to_thread(detect_fields_batch, [img for img, _ in batch])
+        except asyncio.CancelledError:
+            for _, fut in batch:
+                fut.cancel()
+            raise
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            continue
+        for (_, fut), fields in zip(batch, results):
+            if not fut.done():
+                fut.set_result(fields)
+
+
+@app.on_event("startup")
+async def _start_detect_worker():
+    global _detect_worker_task
+    _detect_worker_task = asyncio.create_task(_detect_worker())
+
+
+@app.on_event("shutdown")
+async def _stop_detect_worker():
+    global _detect_worker_task
+    if _detect_worker_task is not None:
+        _detect_worker_task.cancel()
+        _detect_worker_task = None
+    while not _DETECT_Q.empty():
+        _, fut = _DETECT_Q.get_nowait()
+        fut.cancel()
+
 # ================== Routes ===================
 @app.get("/health")
 def health():
-    classes = []
-    if clf is not None and hasattr(clf, "classes_"):
-        classes = list(map(str, clf.classes_))
+    classes = list(_CLF_CLASSES) if clf is not None else []
     return {
         "ok": True,
         "has_model": bool(clf is not None),
@@ -519,18 +732,7 @@ def classify_text(inp: TextIn):
     if vectorizer is None or clf is None:
         return {"error": "Model not trained yet."}
 
-    X = vectorizer.transform([inp.text])
-    proba = getattr(clf, "predict_proba")(X)[0]
-    pred_idx = int(proba.argmax())
-
-    # Use model's own classes_ to avoid mismatch with CATS_PUBLIC
-    if hasattr(clf, "classes_"):
-        label = str(clf.classes_[pred_idx])
-        cls_list = list(map(str, clf.classes_))
-    else:
-        label = CATS_PUBLIC[pred_idx]
-        cls_list = CATS_PUBLIC
-
+    label, proba, cls_list = _ml_predict(inp.text)
     return {"pred": label, "proba": {c: float(p) for c, p in zip(cls_list, proba)}, "source": "ml", "reason": None}
 
 @app.post("/upload_receipt")
@@ -544,9 +746,10 @@ async def upload_receipt(file: UploadFile = File(...), user=Depends(get_current_
     tmp.parent.mkdir(parents=True, exist_ok=True)
 
     content = await file.read()
-    tmp.write_bytes(content)
+    if PERSIST_UPLOADS:
+        await asyncio.to_thread(tmp.write_bytes, content)
 
-    job = await _register_job(user_id=user_id, filename=fname)
+    job = await _register_job(user_id=user_id, filename=fname, payload={"content": content})
     asyncio.create_task(_process_job(job["id"], tmp, user_id, fname))
     return _public_job(job)
 
@@ -560,9 +763,13 @@ async def get_job_status(job_id: str, user=Depends(get_current_user)):
 
 
 async def _process_job(job_id: str, tmp_path: Path, user_id: str, filename: str):
+    # Pop so the upload bytes are released with the pipeline, not the job record
+    payload = _JOB_PAYLOAD.pop(job_id, None) or {}
     await _update_job(job_id, status="processing", started_at=time.time())
     try:
-        result = await _process_receipt_pipeline(tmp_path, user_id, filename)
+        result = await _process_receipt_pipeline(
+            tmp_path, user_id, filename, content=payload.get("content")
+        )
         await _update_job(
             job_id,
             status="completed",
@@ -579,78 +786,97 @@ async def _process_job(job_id: str, tmp_path: Path, user_id: str, filename: str)
         )
 
 
-async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str) -> dict:
+async def _process_receipt_pipeline(
+    tmp_path: Path, user_id: str, filename: str, content: bytes | None = None
+) -> dict:
     tmp = Path(tmp_path)
-    if not tmp.exists():
-        raise FileNotFoundError(f"Uploaded file missing: {tmp}")
-
-    content = tmp.read_bytes()
+    if content is None:
+        # Only re-read from disk when the upload bytes were not handed over in memory
+        if not tmp.exists():
+            raise FileNotFoundError(f"Uploaded file missing: {tmp}")
+        content = tmp.read_bytes()
     fname = filename
 
+    # Decode once; cv2.imread on the same bytes would fail the same way
     img = None
     try:
-        img = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+        img = decode_bytes_to_bgr(content)
     except Exception:
         img = None
-    if img is None:
-        img = cv2.imread(str(tmp))
+
+    def _launch_engines():
+        paddle = tess = ocr_sp = None
+        if PADDLE_VL_ENABLED:
+            paddle = asyncio.create_task(
+                _run_ocr("paddle_vl", image_bytes=content, filename=fname)
+            )
+        if TESSERACT_ENABLED and OCR_STRATEGY_CONTEXT.has("tesseract"):
+            tess = asyncio.create_task(
+                _run_ocr("tesseract", image_bytes=content, filename=fname)
+            )
+        if OCR_SPACE_ENABLED:
+            ocr_sp = asyncio.create_task(
+                _run_ocr("ocr_space", image_bytes=content, filename=fname)
+            )
+        return paddle, tess, ocr_sp
+
+    paddle_task = None
+    tess_task = None
+    ocr_space_task = None
+    if not YOLO_FAST_PATH:
+        # Fire the full-page engines first so they overlap with YOLO + crop OCR
+        paddle_task, tess_task, ocr_space_task = _launch_engines()
 
     fields = []
     yolo_store = yolo_total = yolo_date = None
     yolo_total_text = None
     yolo_total_attempts: list[str] = []
+    yolo_min_conf = 0.0
     if img is not None:
         try:
-            fields = detect_fields(img)
+            fields = await _detect(img)
             if fields:
-                best = max(
-                    [f for f in fields if f["name"] == "Merchant"],
-                    key=lambda x: x["conf"],
-                    default=None,
-                )
-                if best:
-                    yolo_store = ocr_crop(img, best["box"], psm=7)
-
-                best = max(
-                    [f for f in fields if f["name"] == "Total"],
-                    key=lambda x: x["conf"],
-                    default=None,
+                # One pass: highest-confidence detection per class (first wins ties)
+                best_by_name: dict[str, dict] = {}
+                for f in fields:
+                    cur = best_by_name.get(f["name"])
+                    if cur is None or f["conf"] > cur["conf"]:
+                        best_by_name[f["name"]] = f
+                best_merchant = best_by_name.get("Merchant")
+                best_total = best_by_name.get("Total")
+                best_date = best_by_name.get("Date")
+                if best_merchant and best_total and best_date:
+                    yolo_min_conf = min(d["conf"] for d in (best_merchant, best_total, best_date))
+                # Each crop pass shells out to Tesseract; run them side by side
+                store_txt, total_res, date_txt = await asyncio.gather(
+                    _crop_ocr(ocr_crop, img, best_merchant, psm=7),
+                    _crop_ocr(ocr_amount_from_crop, img, best_total),
+                    _crop_ocr(ocr_crop, img, best_date, psm=6),
                 )
-                if best:
-                    yolo_total_val, yolo_text, tries = ocr_amount_from_crop(img, best["box"])
+                if best_merchant:
+                    yolo_store = store_txt
+                if total_res is not None:
+                    yolo_total_val, yolo_text, tries = total_res
                     if yolo_total_val is not None:
                         yolo_total = yolo_total_val
                         yolo_total_text = yolo_text
                     if tries:
                         yolo_total_attempts = tries
-
-                best = max(
-                    [f for f in fields if f["name"] == "Date"],
-                    key=lambda x: x["conf"],
-                    default=None,
-                )
-                if best:
-                    date_txt = ocr_crop(img, best["box"], psm=6)
+                if date_txt is not None:
                     yolo_date = extract_date(date_txt)
         except Exception:
             fields = []
 
-    paddle_task = None
-    tess_task = None
-    ocr_space_task = None
-
-    if PADDLE_VL_ENABLED:
-        paddle_task = asyncio.create_task(
-            OCR_STRATEGY_CONTEXT.run("paddle_vl", image_bytes=content, filename=fname)
-        )
-    if TESSERACT_ENABLED and OCR_STRATEGY_CONTEXT.has("tesseract"):
-        tess_task = asyncio.create_task(
-            OCR_STRATEGY_CONTEXT.run("tesseract", image_bytes=content, filename=fname)
-        )
-    if OCR_SPACE_ENABLED:
-        ocr_space_task = asyncio.create_task(
-            OCR_STRATEGY_CONTEXT.run("ocr_space", image_bytes=content, filename=fname)
-        )
+    # Clean receipt: YOLO crops already gave confident store/total/date, skip the engines
+    yolo_fast = bool(
+        YOLO_FAST_PATH
+        and yolo_store
+        and yolo_total is not None
+        and yolo_date
+        and yolo_min_conf >= YOLO_FAST_PATH_MIN_CONF
+    )
+    if YOLO_FAST_PATH and not yolo_fast:
+        paddle_task, tess_task, ocr_space_task = _launch_engines()
 
     vl_store = vl_total = vl_date = None
     vl_source_tag = None
@@ -662,7 +888,7 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
             vl_result = await asyncio.wait_for(paddle_task, timeout=60)
             vl_payload = vl_result.payload
             if vl_payload.get("ok") and vl_payload.get("text"):
-                s, t, d = parse_fields(vl_payload["text"])
+                s, t, d = _parse_fields_cached(vl_payload["text"])
                 vl_store, vl_total, vl_date = s, t, d
                 vl_source_tag = vl_result.name
                 vl_used = True
@@ -673,21 +899,23 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
             logging.exception("PaddleOCR-VL processing failed")
 
     if vl_payload.get("ok") and fields:
+        crop_jobs = []
         for det in fields:
-            crop_bytes = _crop_to_bytes(img, det["box"]) if img is not None else None
-            if not crop_bytes:
-                continue
-            prompt = None
-            if det["name"] == "Merchant":
-                prompt = "Extract the store or merchant name from this receipt snippet."
-            elif det["name"] == "Total":
-                prompt = "Extract the total amount the customer needs to pay. Return only the numeric amount with currency if present."
-            elif det["name"] == "Date":
-                prompt = "Extract the transaction or receipt date in YYYY-MM-DD format if possible."
-            crop_payload = paddle_vl_text(crop_bytes, prompt=prompt)
+            crop = _crop_to_ndarray(img, det["box"]) if img is not None else None
+            prompt = _PADDLE_CROP_PROMPTS.get(det["name"])
+            if crop is not None and prompt:
+                crop_jobs.append((det, crop, prompt))
+        # All crops of this receipt go through one PaddleOCR-VL predict call
+        crop_payloads = []
+        if crop_jobs:
+            async with _OCR_SEM:
+                crop_payloads = await run_local_ocr(
+                    paddle_vl_text_batch, [(crop, prompt) for _, crop, prompt in crop_jobs]
+                )
+        for (det, _, _), crop_payload in zip(crop_jobs, crop_payloads):
             if not crop_payload.get("ok") or not crop_payload.get("text"):
                 continue
-            cs, ct, cd = parse_fields(crop_payload["text"])
+            cs, ct, cd = _parse_fields_cached(crop_payload["text"])
             if det["name"] == "Merchant" and cs and not vl_store:
                 vl_store = cs
             elif det["name"] == "Total" and ct is not None and vl_total is None:
@@ -722,17 +950,20 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
 
     vision_used = False
     vision_res = {"ok": False, "text": "", "error": None, "info": None}
-    if GCV_ENABLED:
-        need_vision = False
-        if store_t is None or total_t is None or date_t is None:
-            need_vision = True
-        if vl_store is None or vl_total is None or vl_date is None:
-            need_vision = True
-        if (tess_conf or 0) < 55:
-            need_vision = True
-        if need_vision:
+    if GCV_ENABLED and not yolo_fast:
+        missing = (
+            (store_t is None)
+            | (total_t is None) << 1
+            | (date_t is None) << 2
+            | (vl_store is None) << 3
+            | (vl_total is None) << 4
+            | (vl_date is None) << 5
+            | ((tess_conf or 0) < 55) << 6
+        )
+        logging.debug("Vision trigger bits for %s: %s", fname, format(missing, "07b"))
+        if missing & _VISION_TRIGGER_MASK:
             vision_res = (
-                await OCR_STRATEGY_CONTEXT.run(
+                await _run_ocr(
                     "google_vision", image_bytes=content, filename=fname
                 )
             ).payload
@@ -746,9 +977,18 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
             "date": vl_date,
             "confidence": 90.0 if vl_payload.get("ok") else 0.0,
         }
-    store_r, total_r, date_r, source_tag = resolve_fields(
-        rec, tess_conf, ocrs, vision_res, paddle=paddle_candidate
-    )
+    if yolo_fast:
+        store_r = total_r = date_r = None
+        source_tag = "yolo"
+        # No full-page OCR ran: the crop reads are the receipt text for the rules, the
+        # classifier and the stored row, and ocr_conf stays unknown rather than 0
+        tess_text = " ".join(t for t in (store_txt, yolo_total_text, date_txt) if t)
+        rec = {"text": tess_text, "mean_conf": None, "words": []}
+    else:
+        store_r, total_r, date_r, source_tag = resolve_fields(
+            rec, tess_conf, ocrs, vision_res, paddle=paddle_candidate,
+            tess_parsed=(store_t, total_t, date_t) if tess_text else None,
+        )
 
     store = yolo_store or vl_store or store_r
     total = (
@@ -770,13 +1010,7 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
     if cat_rule_val:
         category, confidence, source = cat_rule_val, 0.99, "rule"
     elif vectorizer is not None and clf is not None:
-        X = vectorizer.transform([tess_text])
-        proba = getattr(clf, "predict_proba")(X)[0]
-        pred_idx = int(proba.argmax())
-        if hasattr(clf, "classes_"):
-            category = str(clf.classes_[pred_idx])
-        else:
-            category = CATS_PUBLIC[pred_idx]
+        category, proba, _ = _ml_predict(tess_text)
         confidence = float(proba.max())
         source = "ml"
 
@@ -790,6 +1024,7 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
         "ocr_space": "OCR.space",
         "vision": "Google Vision",
         "consensus": "Consensus (multiple engines agreed)",
+        "yolo": "YOLO field crops",
     }
     source_friendly = source_labels.get(source_tag, source_tag)
 
@@ -798,18 +1033,20 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
     final_total = total
     final_date = date_iso
     if (tess_conf or 0) < 50 and vision_res.get("ok") and vision_res.get("text"):
-        gv_store, gv_total, gv_date = parse_fields(vision_res["text"])
+        gv_store, gv_total, gv_date = _parse_fields_cached(vision_res["text"])
         if gv_store or gv_total is not None or gv_date:
             final_store = gv_store or final_store
             final_total = gv_total if gv_total is not None else final_total
             final_date = gv_date or final_date
             source_tag = "vision"
 
+    final_store_norm = normalize_store_name(final_store) if final_store else None
+
     insert_receipt(
         _id=tmp.stem,
         user_id=user_id,
         store=final_store,
-        store_norm=normalize_store_name(final_store) if final_store else None,
+        store_norm=final_store_norm,
         date_iso=final_date,
         total=_clean_num(final_total),
         category=category,
@@ -818,11 +1055,12 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
         ocr_conf=_clean_num(rec.get("mean_conf")),
         text=tess_text,
     )
+    invalidate_user_stats(user_id)
 
     return {
         "id": tmp.stem,
         "store": final_store,
-        "store_normalized": normalize_store_name(final_store) if final_store else None,
+        "store_normalized": final_store_norm,
         "date": final_date,
         "total": final_total,
         "yolo_total_text": yolo_total_text,
@@ -852,37 +1090,151 @@ async def _process_receipt_pipeline(tmp_path: Path, user_id: str, filename: str)
         "ocr_source_label": source_friendly,
     }
 
+# ================== feedback write-behind ==================
+_FEEDBACK_Q: asyncio.Queue = asyncio.Queue()
+_FEEDBACK_BATCH = 64
+_feedback_writer_task: Optional[asyncio.Task] = None
+
+
+def _drain_feedback_nowait(limit: int) -> list[tuple[Optional[str], str, str]]:
+    rows = []
+    while len(rows) < limit:
+        try:
+            rows.append(_FEEDBACK_Q.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return rows
+
+
+async def _feedback_writer():
+    """Single consumer: flush whatever has queued up in one batched INSERT."""
+    while True:
+        rows = [await _FEEDBACK_Q.get()]
+        rows.extend(_drain_feedback_nowait(_FEEDBACK_BATCH - 1))
+        try:
+            await asyncio.to_thread(insert_feedback, rows)
+        except Exception:
+            logging.exception("Failed to write %d feedback rows", len(rows))
+        finally:
+            for _ in rows:
+                _FEEDBACK_Q.task_done()
+
+
+@app.on_event("startup")
+async def _start_feedback_writer():
+    global _feedback_writer_task
+    _feedback_writer_task = asyncio.create_task(_feedback_writer())
+
+
+@app.on_event("shutdown")
+async def _close_http_clients():
+    if _SUPABASE_HTTP is not None:
+        await _SUPABASE_HTTP.aclose()
+    await ocr_space_aclose()
+
+
+@app.on_event("shutdown")
+async def _stop_feedback_writer():
+    if _feedback_writer_task is not None:
+        _feedback_writer_task.cancel()
+    rows = _drain_feedback_nowait(_FEEDBACK_Q.qsize())
+    if rows:
+        insert_feedback(rows)
+
+
 @app.post("/feedback")
 async def feedback(text: str = Form(...), true_label: str = Form(...), user=Depends(get_current_user)):
-    # You could store user_id along with the feedback if you want per-user auditing
-    if true_label not in CATS_PUBLIC:
+    if true_label not in CATS_PUBLIC_SET:
         return {"ok": False, "msg": f"true_label must be one of {CATS_PUBLIC}"}
-    row = pd.DataFrame([[text, true_label]], columns=["text", "label"])
-    if FPATH.exists():
-        row.to_csv(FPATH, mode="a", header=False, index=False)
-    else:
-        row.to_csv(FPATH, index=False)
+    await _FEEDBACK_Q.put((user.get("sub"), text, true_label))
     return {"ok": True}
 
+_RETRAIN_LOCK = asyncio.Lock()
+
+
+def _do_partial_fit() -> tuple[int, Optional[SGDClassifier]]:
+    """
+    Blocking part of /retrain_incremental: partial_fit a copy of clf on the feedback and
+    persist it. The live model is never touched, so concurrent predictions keep reading
+    consistent weights; the caller swaps the returned copy in. (0, None) if no feedback.
+    """
+    model = copy.deepcopy(clf)
+    classes = list(_CLF_CLASSES or CATS_PUBLIC)
+    # plain_sgd updates coef_ rows in place and needs them C-contiguous; restore
+    # Fortran order afterwards for fast predict
+    model.coef_ = np.ascontiguousarray(model.coef_)
+    count = 0
+    for texts, labels in iter_feedback():
+        model.partial_fit(vectorizer.transform(texts), labels, classes=classes)
+        count += len(texts)
+    if not count:
+        return 0, None
+    model.coef_ = np.asfortranarray(model.coef_)
+    dump(model, CPATH)
+    return count, model
+
+
 @app.post("/retrain_incremental")
 async def retrain_incremental(user=Depends(get_current_user)):
+    global clf, _CLF_CLASSES
     # (kept auth just in case; you can restrict by role/claim)
-    global clf, vectorizer
     if vectorizer is None or clf is None:
         return {"ok": False, "msg": "Train a base model first (train/train.py)."}
-    if not FPATH.exists():
+    if _RETRAIN_LOCK.locked():
+        raise HTTPException(status_code=409, detail="Retrain already in progress")
+    async with _RETRAIN_LOCK:
+        if _feedback_writer_task is not None:
+            await _FEEDBACK_Q.join()  # make sure accepted feedback is committed
+        # sklearn fit + joblib dump are CPU/disk bound; keep the event loop free
+        count, model = await asyncio.to_thread(_do_partial_fit)
+        if model is not None:
+            clf, _CLF_CLASSES = model, _model_classes(model)
+    if not count:
         return {"ok": False, "msg": "No feedback yet."}
-    fb = pd.read_csv(FPATH).dropna(subset=["text", "label"])
-    X = vectorizer.transform(fb.text.fillna(""))
-    classes = list(map(str, getattr(clf, "classes_", CATS_PUBLIC)))
-    clf.partial_fit(X, fb.label, classes=classes)
-    dump(clf, CPATH)
-    return {"ok": True, "count": int(len(fb))}
+    return {"ok": True, "count": count}
 
-@app.get("/receipts")
-def get_receipts(limit: int = 50, offset: int = 0, user=Depends(get_current_user)):
-    rows = list_receipts(user_id=user.get("sub"), limit=limit, offset=offset)
-    return [{
+# One encoder for the hand-built list responses: rows may carry raw date/datetime
+# (and numpy) values, which orjson formats in C; the stdlib fallback uses isoformat.
+if orjson is not None:
+    _dumps = functools.partial(orjson.dumps, option=orjson.OPT_SERIALIZE_NUMPY)
+else:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, default=_serialize_value).encode()
+
+
+def _json_list(rows: list[dict]) -> Response:
+    # Skip jsonable_encoder's per-value walk
+    return Response(_dumps(rows), media_type="application/json")
+
+
+def _encode_cursor(ts_iso: str, row_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{ts_iso}|{row_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[tuple[_datetime, str]]:
+    if not cursor:
+        return None
+    try:
+        ts_iso, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return _datetime.fromisoformat(ts_iso), row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _paged(rows: list[dict], limit: int, ts_field: str) -> Response:
+    """List body stays a plain array; the keyset cursor for the next page rides in a header."""
+    resp = _json_list(rows)
+    if rows and len(rows) >= limit and rows[-1].get(ts_field):
+        ts = _serialize_value(rows[-1][ts_field])
+        resp.headers["X-Next-Cursor"] = _encode_cursor(ts, rows[-1]["id"])
+    return resp
+
+
+def _receipt_dict(r) -> dict:
+    if orjson is not None:
+        # orjson writes date/datetime as ISO strings and NaN as null on its own
+        return r._asdict()
+    return {
         "id": r.id,
         "store": r.store,
         "store_normalized": r.store_normalized,
@@ -893,132 +1245,276 @@ def get_receipts(limit: int = 50, offset: int = 0, user=Depends(get_current_user
         "confidence": _nan_none(r.confidence),
         "ocr_conf": _nan_none(r.ocr_conf),
         "created_at": r.created_at.isoformat()
-    } for r in rows]
+    }
+
+
+def _receipt_rows(user_id: Optional[str], limit: int, offset: int, after) -> list[dict]:
+    return list_receipts(user_id=user_id, limit=limit, offset=offset, after=after, convert=_receipt_dict)
+
+
+@app.get("/receipts")
+async def get_receipts(
+    limit: int = 50, offset: int = 0, cursor: Optional[str] = None, user=Depends(get_current_user)
+):
+    after = _decode_cursor(cursor)
+    rows = await asyncio.to_thread(_receipt_rows, user.get("sub"), limit, offset, after)
+    return _paged(rows, limit, "created_at")
+
+
+def _export_lines(user_id: Optional[str]):
+    for r in iter_receipts(user_id):
+        yield _dumps(_receipt_dict(r)) + b"\n"
+
+
+@app.get("/receipts/export")
+def export_receipts(user=Depends(get_current_user)):
+    """All of the user's receipts as newline-delimited JSON, streamed in DB-sized batches."""
+    return StreamingResponse(_export_lines(user.get("sub")), media_type="application/x-ndjson")
+
+# ================== stats result cache ==================
+# Dashboard loads fan out to several aggregation endpoints; cache each result per
+# (endpoint, user, data version, params) briefly; any write bumps the user's version.
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "60"))
+_STATS_CACHE_MAX = 4096
+_STATS_CACHE: "OrderedDict[tuple, tuple[Any, float]]" = OrderedDict()
+_STATS_LOCK = threading.Lock()  # update_receipt invalidates from the threadpool
+
+
+# Conditional GETs: a per-user version bumped on every data change, salted with a
+# per-process id (versions are not shared across workers) and today's date (the
+# month-to-date / rolling windows move at midnight with no write).
+_BOOT_ID = uuid.uuid4().hex[:8]
+_USER_VERSION: dict[Optional[str], int] = {}
+
+
+def _bump_user_version(user_id: Optional[str]):
+    with _STATS_LOCK:
+        _USER_VERSION[user_id] = _USER_VERSION.get(user_id, 0) + 1
+
+
+def _user_etag(user_id: Optional[str]) -> str:
+    return f'W/"{_BOOT_ID}-{_USER_VERSION.get(user_id, 0)}-{_date.today().isoformat()}"'
+
+
+# Per-user JSON: never stored by shared caches. Stats may be reused for 30s; the
+# categories dropdown revalidates every time so a new custom label shows up at once.
+_STATS_CACHE_CONTROL = "private, max-age=30"
+_CATEGORIES_CACHE_CONTROL = "private, no-cache"
+
+
+def _not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    inm = request.headers.get("if-none-match")
+    if inm and etag in (t.strip() for t in inm.split(",")):
+        # A 304 repeats the 200's Cache-Control so refreshed copies keep its directives
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+def invalidate_user_stats(user_id: Optional[str]):
+    # Entries are keyed on the user's version, so bumping it is the whole invalidation:
+    # old entries stop matching and age out of the LRU, and a computation that started
+    # before the write stores its result under the old version, never the new one.
+    _bump_user_version(user_id)
+
+
+async def _cached_stats(request: Request, response: Response, fn, user_id: Optional[str], **params):
+    etag = _user_etag(user_id)
+    if (nm := _not_modified(request, etag, _STATS_CACHE_CONTROL)) is not None:
+        return nm
+    response.headers["Cache-Control"] = _STATS_CACHE_CONTROL
+    response.headers["ETag"] = etag
+    key = (fn.__name__, user_id, _USER_VERSION.get(user_id, 0), *sorted(params.items()))
+    now = time.time()
+    with _STATS_LOCK:
+        entry = _STATS_CACHE.get(key)
+        if entry and entry[1] > now:
+            _STATS_CACHE.move_to_end(key)
+            return entry[0]
+    afn = STATS_ASYNC.get(fn)
+    if afn is not None:
+        value = await afn(user_id=user_id, **params)  # asyncpg: no threadpool hop
+    else:
+        value = await asyncio.to_thread(fn, user_id=user_id, **params)
+    if STATS_CACHE_TTL > 0:
+        with _STATS_LOCK:
+            _STATS_CACHE[key] = (value, now + STATS_CACHE_TTL)
+            _STATS_CACHE.move_to_end(key)
+            while len(_STATS_CACHE) > _STATS_CACHE_MAX:
+                _STATS_CACHE.popitem(last=False)
+    return value
+
+
+@app.on_event("shutdown")
+async def _dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
 
 @app.get("/stats/summary")
-def get_stats_summary(user=Depends(get_current_user)):
-    return stats_summary(user_id=user.get("sub"))
+async def get_stats_summary(request: Request, response: Response, user=Depends(get_current_user)):
+    return await _cached_stats(request, response, stats_summary, user.get("sub"))
 
 @app.get("/stats/by_category")
-def get_stats_by_category(user=Depends(get_current_user)):
-    return stats_by_category(user_id=user.get("sub"))
+async def get_stats_by_category(request: Request, response: Response, user=Depends(get_current_user)):
+    return await _cached_stats(request, response, stats_by_category, user.get("sub"))
 
 @app.get("/stats/by_month")
-def get_stats_by_month(year: int, user=Depends(get_current_user)):
-    return stats_by_month(year, user_id=user.get("sub"))
+async def get_stats_by_month(
+    year: int, request: Request, response: Response, user=Depends(get_current_user)
+):
+    return await _cached_stats(request, response, stats_by_month, user.get("sub"), year=year)
 
 
 @app.get("/stats/top_merchants")
-def get_top_merchants(limit: int = 5, user=Depends(get_current_user)):
-    return top_merchants_current_month(user_id=user.get("sub"), limit=limit)
+async def get_top_merchants(
+    request: Request, response: Response, limit: int = 5, user=Depends(get_current_user)
+):
+    return await _cached_stats(request, response, top_merchants_current_month, user.get("sub"), limit=limit)
 
 
 @app.get("/stats/weekday_spend")
-def get_weekday_spend(user=Depends(get_current_user)):
-    return weekday_spend(user_id=user.get("sub"))
+async def get_weekday_spend(request: Request, response: Response, user=Depends(get_current_user)):
+    return await _cached_stats(request, response, weekday_spend, user.get("sub"))
 
 
 @app.get("/stats/rolling_30")
-def get_rolling_30(user=Depends(get_current_user)):
-    return rolling_30_day_spend(user_id=user.get("sub"))
+async def get_rolling_30(request: Request, response: Response, user=Depends(get_current_user)):
+    return await _cached_stats(request, response, rolling_30_day_spend, user.get("sub"))
 
 
 @app.get("/receipts/low_confidence")
-def get_low_confidence(threshold: float = 0.6, limit: int = 50, user=Depends(get_current_user)):
-    return low_confidence_receipts(user_id=user.get("sub"), threshold=threshold, limit=limit)
+async def get_low_confidence(threshold: float = 0.6, limit: int = 50, user=Depends(get_current_user)):
+    return await asyncio.to_thread(low_confidence_receipts, user_id=user.get("sub"), threshold=threshold, limit=limit)
 
-@app.patch("/receipts/{rid}")
-def update_receipt(rid: str, upd: ReceiptUpdate, user=Depends(get_current_user)):
-    user_id = user.get("sub")
-    if not user_id:
-        raise HTTPException(status_code=401, detail="No user id")
+# ================== label usage write-behind ==================
+# Usage counters are bumped on every recategorization; coalesce them per
+# (user, label) and apply one batched UPDATE instead of a transaction per edit.
+_USAGE_Q: asyncio.Queue = asyncio.Queue(maxsize=10_000)
+_USAGE_FLUSH_INTERVAL = 1.0
+_usage_worker_task: Optional[asyncio.Task] = None
+_USAGE_PENDING: Counter = Counter()  # dequeued but not yet written (survives worker cancel)
+
+
+def _take_usage_pending() -> Counter:
+    global _USAGE_PENDING
+    while True:
+        try:
+            _USAGE_PENDING[_USAGE_Q.get_nowait()] += 1
+        except asyncio.QueueEmpty:
+            break
+    deltas, _USAGE_PENDING = _USAGE_PENDING, Counter()
+    return deltas
 
+
+async def _usage_worker():
+    while True:
+        _USAGE_PENDING[await _USAGE_Q.get()] += 1
+        await asyncio.sleep(_USAGE_FLUSH_INTERVAL)  # let a bulk edit pile up
+        deltas = _take_usage_pending()
+        try:
+            await asyncio.to_thread(add_label_usage, dict(deltas))
+        except Exception:
+            logging.exception("Failed to apply label usage for %d labels", len(deltas))
+        for uid in {uid for uid, _ in deltas}:
+            invalidate_user_labels(uid)
+
+
+@app.on_event("startup")
+async def _start_usage_worker():
+    global _usage_worker_task
+    _usage_worker_task = asyncio.create_task(_usage_worker())
+
+
+@app.on_event("shutdown")
+async def _stop_usage_worker():
+    if _usage_worker_task is not None:
+        _usage_worker_task.cancel()
+    deltas = _take_usage_pending()
+    if deltas:
+        add_label_usage(dict(deltas))
+
+
+# Only the editable columns; the full row drags the OCR text along. Built once so the
+# compiled SQL is reused across edits.
+_RECEIPT_EDIT_FIELDS_STMT = select(
+    Receipt.store, Receipt.date, Receipt.total, Receipt.category
+).where(Receipt.id == bindparam("rid"), Receipt.user_id == bindparam("uid"))
+
+
+def _apply_receipt_update(rid: str, user_id: str, data: dict):
+    owned = (Receipt.id == rid, Receipt.user_id == user_id)
     with SessionLocal() as db:
-        r = (
-            db.query(Receipt)
-            .filter(Receipt.id == rid, Receipt.user_id == user_id)
-            .first()
-        )
-        if not r:
+        old = db.execute(_RECEIPT_EDIT_FIELDS_STMT, {"rid": rid, "uid": user_id}).first()
+        if not old:
             raise HTTPException(status_code=404, detail="not found")
 
-        original_values = {
-            "store": r.store,
-            "date": r.date,
-            "total": r.total,
-            "category": r.category,
-        }
-
-        data = upd.model_dump(exclude_unset=True)
-        if "date" in data and data["date"] is not None:
-            try:
-                data["date"] = _date.fromisoformat(data["date"])
-            except Exception:
-                data["date"] = None
-
-        corrections: list[ReceiptCorrection] = []
-        for field in ("store", "date", "total", "category"):
-            if field in data:
-                old_val = original_values.get(field)
-                new_val = data[field]
-                if _serialize_value(old_val) != _serialize_value(new_val):
-                    corrections.append(
-                        ReceiptCorrection(
-                            receipt_id=rid,
-                            user_id=user_id,
-                            field_name=field,
-                            old_value=_serialize_value(old_val),
-                            new_value=_serialize_value(new_val),
-                            change_type="ocr"
-                            if field in {"store", "date", "total"}
-                            else "category",
-                        )
-                    )
-
-        for k, v in data.items():
-            setattr(r, k, v)
+        original_values = old._asdict()
 
+        corrections: list[dict] = []
+        for field in sorted(data.keys() & _EDITABLE_FIELDS):  # sorted: stable log order
+            old_s = _serialize_value(original_values[field])
+            new_s = _serialize_value(data[field])
+            if old_s == new_s:
+                continue
+            corrections.append({
+                "receipt_id": rid,
+                "user_id": user_id,
+                "field_name": field,
+                "old_value": old_s,
+                "new_value": new_s,
+                "change_type": "ocr" if field in _OCR_FIELDS else "category",
+            })
+
+        changed = {k: v for k, v in data.items() if v != original_values[k]}
+        if changed:
+            db.execute(update(Receipt).where(*owned).values(**changed))
+            if changed.keys() & {"date", "total"}:
+                # move the receipt's share of the daily rollup to its new day/amount
+                adjust_daily_rollup(db, user_id, old.date, old.total, sign=-1)
+                adjust_daily_rollup(
+                    db, user_id, changed.get("date", old.date), changed.get("total", old.total)
+                )
         if corrections:
-            db.add_all(corrections)
+            db.execute(insert(ReceiptCorrection), corrections)  # executemany, compiled once
+        if changed or corrections:
+            db.commit()
+
 
-        db.commit()
+@app.patch("/receipts/{rid}")
+async def update_receipt(rid: str, upd: ReceiptUpdate, user=Depends(get_current_user)):
+    user_id = user.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="No user id")
+
+    data = upd.model_dump(exclude_unset=True)
+    await asyncio.to_thread(_apply_receipt_update, rid, user_id, data)
+    invalidate_user_stats(user_id)
 
     # Track usage of custom labels (if category changed to a custom one)
     if "category" in data and data["category"]:
         new_cat = data["category"]
-        if new_cat not in CATS_PUBLIC:
-            # It's a custom label - increment usage
-            increment_label_usage(user_id, new_cat)
+        if new_cat not in CATS_PUBLIC_SET:
+            # It's a custom label - increment usage (batched by _usage_worker)
+            try:
+                _USAGE_Q.put_nowait((user_id, new_cat))
+            except asyncio.QueueFull:
+                await asyncio.to_thread(increment_label_usage, user_id, new_cat)
+                invalidate_user_labels(user_id)
 
     return {"ok": True}
 
 
 @app.get("/logs/corrections")
-def get_correction_logs(limit: int = 200, user=Depends(get_current_user)):
+async def get_correction_logs(
+    limit: int = 200, cursor: Optional[str] = None, user=Depends(get_current_user)
+):
     user_id = user.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="No user id")
+    after = _decode_cursor(cursor)
+    return _paged(await asyncio.to_thread(list_corrections, user_id, limit, after), limit, "logged_at")
+
 
-    with SessionLocal() as db:
-        rows = (
-            db.query(ReceiptCorrection)
-            .filter(ReceiptCorrection.user_id == user_id)
-            .order_by(ReceiptCorrection.logged_at.desc())
-            .limit(limit)
-            .all()
-        )
-    return [
-        {
-            "id": row.id,
-            "receipt_id": row.receipt_id,
-            "field": row.field_name,
-            "old": row.old_value,
-            "new": row.new_value,
-            "type": row.change_type,
-            "logged_at": row.logged_at.isoformat() if row.logged_at else None,
-        }
-        for row in rows
-    ]
 @app.get("/debug/token")
 async def debug_token(request: Request):
     auth = request.headers.get("authorization")
@@ -1040,17 +1536,49 @@ class CustomLabelUpdate(BaseModel):
     description: str | None = None
 
 
+# Per-user label lists only change through the CRUD routes below and usage bumps in
+# update_receipt, so serve them from memory until one of those invalidates the entry.
+_LABELS_CACHE_TTL = 300
+_LABELS_CACHE_MAX = 10_000
+_LABELS_CACHE: "OrderedDict[str, tuple[list[dict], float]]" = OrderedDict()
+_LABELS_LOCK = threading.Lock()
+
+
+def invalidate_user_labels(user_id: str):
+    _bump_user_version(user_id)
+    with _LABELS_LOCK:
+        _LABELS_CACHE.pop(user_id, None)
+
+
+async def _cached_custom_labels(user_id: str) -> list[dict]:
+    now = time.time()
+    with _LABELS_LOCK:
+        entry = _LABELS_CACHE.get(user_id)
+        if entry and entry[1] > now:
+            _LABELS_CACHE.move_to_end(user_id)
+            return entry[0]
+    labels = await asyncio.to_thread(list_custom_labels, user_id)
+    with _LABELS_LOCK:
+        _LABELS_CACHE[user_id] = (labels, now + _LABELS_CACHE_TTL)
+        _LABELS_CACHE.move_to_end(user_id)
+        while len(_LABELS_CACHE) > _LABELS_CACHE_MAX:
+            _LABELS_CACHE.popitem(last=False)
+    return labels
+
+
 @app.get("/custom_labels")
-def get_custom_labels(user=Depends(get_current_user)):
+async def get_custom_labels(user=Depends(get_current_user)):
     """List all custom labels for the current user."""
     user_id = user.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="No user id")
-    return list_custom_labels(user_id)
+    return await _cached_custom_labels(user_id)
 
 
 @app.post("/custom_labels")
-def create_label(data: CustomLabelCreate, user=Depends(get_current_user)):
+def create_label(
+    data: CustomLabelCreate, user=Depends(get_current_user), db: Session = Depends(get_db)
+):
     """Create a new custom label."""
     user_id = user.get("sub")
     if not user_id:
@@ -1066,27 +1594,34 @@ def create_label(data: CustomLabelCreate, user=Depends(get_current_user)):
             color=data.color,
             icon=data.icon,
             description=data.description,
+            db=db,
         )
+        invalidate_user_labels(user_id)
         return {"ok": True, "label": label}
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
 
 
 @app.get("/custom_labels/{label_id}")
-def get_label(label_id: str, user=Depends(get_current_user)):
+async def get_label(label_id: str, user=Depends(get_current_user)):
     """Get a single custom label by ID."""
     user_id = user.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="No user id")
     
-    label = get_custom_label(user_id, label_id)
+    label = await asyncio.to_thread(get_custom_label, user_id, label_id)
     if not label:
         raise HTTPException(status_code=404, detail="Label not found")
     return label
 
 
 @app.patch("/custom_labels/{label_id}")
-def patch_label(label_id: str, data: CustomLabelUpdate, user=Depends(get_current_user)):
+def patch_label(
+    label_id: str,
+    data: CustomLabelUpdate,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     """Update a custom label."""
     user_id = user.get("sub")
     if not user_id:
@@ -1100,29 +1635,39 @@ def patch_label(label_id: str, data: CustomLabelUpdate, user=Depends(get_current
             color=data.color,
             icon=data.icon,
             description=data.description,
+            db=db,
         )
         if not label:
             raise HTTPException(status_code=404, detail="Label not found")
+        invalidate_user_labels(user_id)
         return {"ok": True, "label": label}
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
 
 
 @app.delete("/custom_labels/{label_id}")
-def remove_label(label_id: str, user=Depends(get_current_user)):
+def remove_label(label_id: str, user=Depends(get_current_user), db: Session = Depends(get_db)):
     """Delete a custom label."""
     user_id = user.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="No user id")
     
-    deleted = delete_custom_label(user_id, label_id)
+    deleted = delete_custom_label(user_id, label_id, db=db)
     if not deleted:
         raise HTTPException(status_code=404, detail="Label not found")
+    invalidate_user_labels(user_id)
     return {"ok": True}
 
 
+# Built-in categories never change at runtime
+_BUILTIN_CATS = [
+    {"name": cat, "type": "builtin", "color": None, "icon": None}
+    for cat in CATS_PUBLIC
+]
+
+
 @app.get("/categories")
-def get_all_categories(user=Depends(get_current_user)):
+async def get_all_categories(request: Request, response: Response, user=Depends(get_current_user)):
     """
     Get all available categories: built-in + user's custom labels.
     Useful for populating category dropdowns.
@@ -1130,15 +1675,15 @@ def get_all_categories(user=Depends(get_current_user)):
     user_id = user.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="No user id")
-    
-    # Built-in categories
-    builtin = [
-        {"name": cat, "type": "builtin", "color": None, "icon": None}
-        for cat in CATS_PUBLIC
-    ]
-    
+
+    etag = _user_etag(user_id)
+    if (nm := _not_modified(request, etag, _CATEGORIES_CACHE_CONTROL)) is not None:
+        return nm
+    response.headers["Cache-Control"] = _CATEGORIES_CACHE_CONTROL
+    response.headers["ETag"] = etag
+
     # Custom labels
-    custom = list_custom_labels(user_id)
+    custom = await _cached_custom_labels(user_id)
     custom_cats = [
         {
             "name": label["name"],
@@ -1151,9 +1696,11 @@ def get_all_categories(user=Depends(get_current_user)):
         for label in custom
     ]
     
-    return {"builtin": builtin, "custom": custom_cats}
+    return {"builtin": _BUILTIN_CATS, "custom": custom_cats}
 
 
 # Ensure DB tables exist on import
 init_db()
+# Move rows from the legacy data/feedback.csv into the feedback table (first run only)
+import_feedback_csv(FPATH)
 
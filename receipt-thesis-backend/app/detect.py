@@ -1,24 +1,78 @@
 # app/detect.py
+import os
+import threading
+import numpy as np
 from ultralytics import YOLO
-import cv2
 from pathlib import Path
 
 # Weights location (you copied best.pt here)
-MODEL_PATH = Path(__file__).resolve().parents[1] / "models" / "yolo_receipt.pt"
+MODELS_DIR = Path(__file__).resolve().parents[1] / "models"
+MODEL_PATH = MODELS_DIR / "yolo_receipt.pt"
+# Exports from train/export_yolo.py, fastest first; the .pt stays as the CPU fallback
+ENGINE_PATH = MODELS_DIR / "yolo_receipt.engine"  # TensorRT FP16/INT8, CUDA only
+ONNX_PATH = MODELS_DIR / "yolo_receipt.onnx"
 
 # Change these names to exactly match yolo_data/data.yaml → names: [...]
 CLASSES = ["Date", "Merchant", "Total"]
+# Overlapping same-class boxes above this IoU collapse to the most confident one
+NMS_IOU = 0.45
+# Inference size (exported TensorRT engines are built for exactly this size)
+IMGSZ = 1280
+
+# Inference device for Ultralytics ("cpu", "0", "cuda:0"); empty lets it pick the GPU if any
+YOLO_DEVICE = os.getenv("YOLO_DEVICE", "").strip()
 
 _model = None
+_half = False  # FP16 inference, only when running on CUDA
+# train/export_yolo.py exports with a fixed input batch of 1, so only the .pt takes lists
+_batched = False
+# One YOLO instance is shared by every request thread and its predict() is not thread-safe
+_predict_lock = threading.Lock()
+
+def _cuda_available() -> bool:
+    if YOLO_DEVICE == "cpu":
+        return False
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except Exception:
+        return False
+
+def _pick_weights() -> tuple[Path | None, bool]:
+    """Best available weights for this host, and whether they run on CUDA."""
+    cuda = _cuda_available()
+    if cuda and ENGINE_PATH.exists():
+        return ENGINE_PATH, True
+    for path in (ONNX_PATH, MODEL_PATH):
+        if path.exists():
+            return path, cuda
+    return None, False
 
 def get_model():
     """Lazy-load YOLO model once."""
-    global _model
-    if _model is None and MODEL_PATH.exists():
-        _model = YOLO(str(MODEL_PATH))
+    global _model, _half, _batched
+    if _model is None:
+        path, cuda = _pick_weights()
+        if path is not None:
+            # Exported models need task= since they carry no Ultralytics metadata object
+            _model = YOLO(str(path), task="detect")
+            _half = cuda
+            _batched = path.suffix == ".pt"
     return _model
 
-def detect_fields(img_bgr, conf: float = 0.15, imgsz: int = 1280):
+def _predict(m, source, conf: float, imgsz: int):
+    # Ultralytics takes numpy sources as BGR (cv2 order) and does the channel swap and
+    # normalisation inside its own letterbox/to-tensor step, on the GPU when there is one.
+    # iou= runs Ultralytics' per-class (batched) torchvision NMS on the raw box tensors,
+    # on the inference device, so no Python-side overlap merge is needed afterwards.
+    predict_kwargs = {"device": YOLO_DEVICE} if YOLO_DEVICE else {}
+    with _predict_lock:
+        return m.predict(
+            source=source, imgsz=imgsz, conf=conf, iou=NMS_IOU, half=_half, verbose=False,
+            **predict_kwargs,
+        )
+
+def detect_fields(img_bgr, conf: float = 0.15, imgsz: int = IMGSZ):
     """
     Run YOLO on a BGR image and return a list of detections:
     [{"name": <class_name>, "box": (x1,y1,x2,y2), "conf": float}, ...]
@@ -29,16 +83,30 @@ def detect_fields(img_bgr, conf: float = 0.15, imgsz: int = 1280):
         # Model weights not found or failed to load
         return []
 
-    # YOLO expects RGB
-    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-
     # Ultralytics returns a list-like of Results; take first image result
-    results = m.predict(source=img_rgb, imgsz=imgsz, conf=conf, verbose=False)
+    results = _predict(m, img_bgr, conf, imgsz)
     if not results:
         return []
+    return _fields_from_result(results[0], img_bgr)
 
-    res = results[0]
-
+def detect_fields_batch(images: list, conf: float = 0.15, imgsz: int = IMGSZ) -> list[list[dict]]:
+    """
+    detect_fields for several BGR images in one predict call: Ultralytics letterboxes a
+    list source to imgsz and runs it as a single batch. Returns one list per input.
+    Exported engine/ONNX weights have a static batch of 1 and run one image per call.
+    """
+    if not images:
+        return []
+    m = get_model()
+    if m is None:
+        return [[] for _ in images]
+    if not _batched:
+        return [detect_fields(img, conf, imgsz) for img in images]
+    results = _predict(m, list(images), conf, imgsz) or []
+    out = [_fields_from_result(res, img) for res, img in zip(results, images)]
+    return out + [[] for _ in range(len(images) - len(out))]
+
+def _fields_from_result(res, img_bgr) -> list[dict]:
     # Guard: boxes may be missing or empty
     boxes = getattr(res, "boxes", None)
     if boxes is None:
@@ -53,45 +121,24 @@ def detect_fields(img_bgr, conf: float = 0.15, imgsz: int = 1280):
         return []
 
     H, W = img_bgr.shape[:2]
-    raw: list[dict] = []
-    for i in range(n):
-        try:
-            cls_id_t = boxes.cls[i]
-            conf_t = boxes.conf[i]
-            xyxy_t = boxes.xyxy[i]
-
-            cls_id = int(cls_id_t.item())
-            if not (0 <= cls_id < len(CLASSES)):
-                continue
-
-            x1, y1, x2, y2 = map(int, xyxy_t.tolist())
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(W - 1, x2), min(H - 1, y2)
-
-            raw.append({
-                "name": CLASSES[cls_id],
-                "box": (x1, y1, x2, y2),
-                "conf": float(conf_t.item()),
-            })
-        except Exception:
-            continue
+    try:
+        # boxes.data is one (n, 6) tensor [x1, y1, x2, y2, conf, cls]: a single
+        # device->host sync/copy for every box instead of one per field per box
+        data = boxes.data.cpu().numpy()
+    except Exception:
+        return []
+
+    xyxy = data[:, :4].astype(np.int32)
+    xyxy[:, [0, 2]] = np.clip(xyxy[:, [0, 2]], 0, W - 1)
+    xyxy[:, [1, 3]] = np.clip(xyxy[:, [1, 3]], 0, H - 1)
+    confs = data[:, 4].tolist()
+    cls_ids = data[:, 5].astype(np.int32).tolist()
 
-    # Merge overlapping boxes by class, keeping the highest confidence
     merged: list[dict] = []
-    for det in raw:
-        overlaps = [
-            idx for idx, existing in enumerate(merged)
-            if existing["name"] == det["name"] and _iou(existing["box"], det["box"]) > 0.45
-        ]
-        if not overlaps:
-            merged.append(det)
+    for cls_id, conf_f, box in zip(cls_ids, confs, xyxy.tolist()):
+        if not (0 <= cls_id < len(CLASSES)):
             continue
-        best_idx = overlaps[0]
-        for idx in overlaps[1:]:
-            if merged[idx]["conf"] > merged[best_idx]["conf"]:
-                best_idx = idx
-        if det["conf"] > merged[best_idx]["conf"]:
-            merged[best_idx] = det
+        merged.append({"name": CLASSES[cls_id], "box": tuple(box), "conf": conf_f})
 
     # Optionally restrict totals to YOLO when Paddle is disabled; stores rely on PaddleOCR-VL now
     if merged:
@@ -103,16 +150,13 @@ def detect_fields(img_bgr, conf: float = 0.15, imgsz: int = 1280):
     return merged
 
 
-def _iou(boxA: tuple[int, int, int, int], boxB: tuple[int, int, int, int]) -> float:
-    xA = max(boxA[0], boxB[0])
-    yA = max(boxA[1], boxB[1])
-    xB = min(boxA[2], boxB[2])
-    yB = min(boxA[3], boxB[3])
-    interW = max(0, xB - xA)
-    interH = max(0, yB - yA)
-    inter = interW * interH
-    if inter == 0:
-        return 0.0
-    areaA = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
-    areaB = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
-    return inter / float(areaA + areaB - inter + 1e-6)
+def warmup(imgsz: int = IMGSZ) -> bool:
+    """
+    Load the model and push one blank frame through it, so CUDA context setup, cuDNN
+    autotuning and engine deserialisation happen at boot instead of on the first upload.
+    Uses the real inference size: autotuning is per input shape. False if no weights.
+    """
+    if get_model() is None:
+        return False
+    detect_fields(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz)
+    return True
@@ -1,28 +1,71 @@
 from __future__ import annotations
 
 import io
+import os
+import queue
 import re
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 
 import cv2
 import numpy as np
 import pytesseract
 from PIL import Image
 
+try:  # optional: libjpeg-turbo SIMD decode for JPEG uploads
+    from turbojpeg import TurboJPEG  # type: ignore
+
+    _TJ = TurboJPEG()
+except Exception:  # pragma: no cover - optional dependency / missing native lib
+    _TJ = None
+
+try:  # optional: in-process tesseract API, loads the language model once instead of per pass
+    from tesserocr import PyTessBaseAPI, RIL, iterate_level  # type: ignore
+except Exception:  # pragma: no cover - optional dependency / missing native lib
+    PyTessBaseAPI = None
+
 DEF_LANG = "eng"
+# Tesseract passes release the GIL (subprocess wait or tesserocr's C++ call), so a thread pool fans them out
+TESSERACT_THREADS = max(1, int(os.getenv("TESSERACT_THREADS", str(os.cpu_count() or 4))))
+_TESS_POOL = ThreadPoolExecutor(max_workers=TESSERACT_THREADS, thread_name_prefix="tesseract")
+# A full-page pass at or above this mean confidence ends the PSM sweep (queued passes are dropped)
+TESSERACT_EARLY_EXIT_CONF = float(os.getenv("TESSERACT_EARLY_EXIT_CONF", "85"))
+# Most to least often best on receipts; with fewer threads than passes, the likely winner runs first
+_FULL_PAGE_PSMS = (6, 4, 3, 11)
+# Long-edge cap for full-page preprocessing; 12MP phone photos don't need full resolution
+PREPROCESS_MAX_SIDE = int(os.getenv("PREPROCESS_MAX_SIDE", "1600"))
+
+cv2.setUseOptimized(True)
+if hasattr(cv2, "ipp"):
+    cv2.ipp.setUseIPP(True)
+
+_JPEG_MAGIC = b"\xff\xd8\xff"
 AMOUNT_RE = re.compile(r"([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})|[0-9]+(?:\.[0-9]{2}))")
 
 
+# GaussianBlur((0, 0), 3) on uint8 uses a 19-tap kernel; build it once and apply it separably
+_G_SIGMA3 = cv2.getGaussianKernel(19, 3)
+
+
 def _unsharp(gray: np.ndarray) -> np.ndarray:
-    blur = cv2.GaussianBlur(gray, (0, 0), 3)
+    blur = cv2.sepFilter2D(gray, -1, _G_SIGMA3, _G_SIGMA3)
     return cv2.addWeighted(gray, 1.5, blur, -0.5, 0)
 
 
 def auto_deskew(gray: np.ndarray) -> np.ndarray:
     blur = cv2.GaussianBlur(gray, (3, 3), 0)
     bw = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-    coords = np.column_stack(np.where(bw > 0))
-    if len(coords) < 10:
+    if cv2.countNonZero(bw) < 10:
         return gray
+    # The hull of all foreground pixels is the hull of each row's outermost two, so feed
+    # minAreaRect ~2 points per row instead of every (row, col) pixel.
+    mask = bw > 0
+    rows = np.flatnonzero(mask.any(axis=1))
+    left = mask.argmax(axis=1)[rows]  # argmax over views; indexing mask[rows] would copy it
+    right = mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1)[rows]
+    coords = np.column_stack((np.concatenate((rows, rows)), np.concatenate((left, right)))).astype(np.int32)
     angle = cv2.minAreaRect(coords)[-1]
     angle = -(90 + angle) if angle < -45 else -angle
     (h, w) = gray.shape[:2]
@@ -31,10 +74,14 @@ def auto_deskew(gray: np.ndarray) -> np.ndarray:
 
 
 def preprocess(img_bgr: np.ndarray) -> np.ndarray:
+    h, w = img_bgr.shape[:2]
+    scale = min(1.0, PREPROCESS_MAX_SIDE / max(h, w)) if PREPROCESS_MAX_SIDE > 0 else 1.0
+    if scale < 1.0:
+        img_bgr = cv2.resize(img_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
     gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
     gray = auto_deskew(gray)
     gray = _unsharp(gray)
-    gray = cv2.bilateralFilter(gray, 9, 75, 75)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)  # separable denoise; bilateral was the costliest step
     th = cv2.adaptiveThreshold(
         gray,
         255,
@@ -43,83 +90,215 @@ def preprocess(img_bgr: np.ndarray) -> np.ndarray:
         31,
         9,
     )
-    th = cv2.dilate(th, np.ones((1, 1), np.uint8), iterations=1)
     return th
 
 
-def _decode_bytes_to_bgr(data: bytes) -> np.ndarray | None:
+def _exif_orientation(data: bytes) -> int:
+    try:
+        return int(Image.open(io.BytesIO(data)).getexif().get(0x0112, 1))
+    except Exception:
+        return 1
+
+
+def decode_bytes_to_bgr(data: bytes) -> np.ndarray | None:
+    # TurboJPEG ignores EXIF orientation, so rotated phone photos go through OpenCV
+    if _TJ is not None and data[:3] == _JPEG_MAGIC and _exif_orientation(data) == 1:
+        try:
+            return _TJ.decode(data)  # BGR by default
+        except Exception:
+            pass
     arr = np.frombuffer(data, np.uint8)
     img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
     if img is not None:
         return img
     try:
         pil = Image.open(io.BytesIO(data)).convert("RGB")
-        return cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
+        # Channel swap as a reversed view + one contiguous copy (cv2 needs positive strides)
+        return np.ascontiguousarray(np.asarray(pil)[..., ::-1])
     except Exception:
         return None
 
 
+# Column order of word rows, and the keys of the columnar "words" payload
+WORD_FIELDS = ("text", "conf", "left", "top", "width", "height", "block_num", "par_num", "line_num", "word_num")
+
+# Idle PyTessBaseAPI handles per language, at most TESSERACT_THREADS of each
+_API_POOLS: dict[str, queue.LifoQueue] = {}
+_API_COUNTS: dict[str, int] = {}
+_API_LOCK = threading.Lock()
+
+
+@contextmanager
+def _tess_api(lang: str):
+    with _API_LOCK:
+        pool = _API_POOLS.setdefault(lang, queue.LifoQueue())
+        create = pool.empty() and _API_COUNTS.get(lang, 0) < TESSERACT_THREADS
+        if create:
+            _API_COUNTS[lang] = _API_COUNTS.get(lang, 0) + 1
+    if create:
+        try:
+            api = PyTessBaseAPI(lang=lang)
+        except Exception:
+            with _API_LOCK:
+                _API_COUNTS[lang] -= 1
+            raise
+    else:
+        api = pool.get()
+    try:
+        yield api
+    finally:
+        pool.put(api)
+
+
+def _api_recognize(api, img: np.ndarray, psm: int, allowlist: str | None) -> None:
+    api.SetPageSegMode(psm)
+    api.SetVariable("tessedit_char_whitelist", allowlist or "")
+    api.SetImage(Image.fromarray(img))
+    api.Recognize()
+
+
+def _api_words(img: np.ndarray, psm: int, allowlist: str | None, lang: str) -> list[tuple]:
+    """Word rows in image_to_data column order, numbering block/par/line/word like the TSV."""
+    rows: list[tuple] = []
+    with _tess_api(lang) as api:
+        _api_recognize(api, img, psm, allowlist)
+        ri = api.GetIterator()
+        if ri is None:
+            return rows
+        block = par = line = word = 0
+        for w in iterate_level(ri, RIL.WORD):
+            if w.IsAtBeginningOf(RIL.BLOCK):
+                block, par = block + 1, 0
+            if w.IsAtBeginningOf(RIL.PARA):
+                par, line = par + 1, 0
+            if w.IsAtBeginningOf(RIL.TEXTLINE):
+                line, word = line + 1, 0
+            word += 1
+            bbox = w.BoundingBox(RIL.WORD)
+            if bbox is None:
+                continue
+            x1, y1, x2, y2 = bbox
+            rows.append(
+                (w.GetUTF8Text(RIL.WORD), w.Confidence(RIL.WORD), x1, y1, x2 - x1, y2 - y1, block, par, line, word)
+            )
+    return rows
+
+
+def _tsv_words(img: np.ndarray | str, cfg: str, lang: str) -> list[tuple]:
+    d = pytesseract.image_to_data(img, lang=lang, config=cfg, output_type=pytesseract.Output.DICT)
+    return list(zip(*(d.get(c, ()) for c in WORD_FIELDS)))
+
+
+def _write_tess_input(img: np.ndarray) -> str | None:
+    """Write img once as an uncompressed TIFF so every pytesseract pass can read the same file."""
+    fd, path = tempfile.mkstemp(prefix="tess_", suffix=".tif")
+    os.close(fd)
+    if cv2.imwrite(path, img, [cv2.IMWRITE_TIFF_COMPRESSION, 1]):
+        return path
+    os.unlink(path)
+    return None
+
+
+def _unlink_when_done(path: str, futures) -> None:
+    # Passes dropped by the early exit may still be reading the file, so wait for all of them
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def _done(_fut) -> None:
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    for fut in futures:
+        fut.add_done_callback(_done)
+
+
 def ocr_image_bytes(data: bytes, lang: str = DEF_LANG) -> dict:
-    img = _decode_bytes_to_bgr(data)
+    img = decode_bytes_to_bgr(data)
     if img is None:
         raise ValueError("Cannot decode image bytes (unsupported/invalid format).")
     prep = preprocess(img)
+    # pytesseract would re-encode the array to a temp PNG on every call; hand it one file instead
+    tess_path = _write_tess_input(prep) if PyTessBaseAPI is None else None
 
     def _ocr_pass(psm: int, allowlist: str | None = None):
         cfg = f"--psm {psm}"
         if allowlist:
             cfg += f" -c tessedit_char_whitelist={allowlist}"
-        txt = pytesseract.image_to_string(prep, lang=lang, config=cfg)
-        df = pytesseract.image_to_data(prep, lang=lang, config=cfg, output_type=pytesseract.Output.DATAFRAME)
-        if "conf" in df:
-            df = df[df.conf != -1]
-        mean_conf = float(df.conf.mean()) if len(df) else float("nan")
-        return txt, mean_conf, df
-
-    best_df = None
-    tries = []
-    for psm in (6, 4, 11, 3):
-        try:
-            t, c, df = _ocr_pass(psm)
-            tries.append((c, t, psm, df))
-        except Exception:
-            continue
-
-    if tries:
-        c, t, used_psm, best_df = max(tries, key=lambda x: x[0])
-    else:
-        t, c, best_df = pytesseract.image_to_string(prep, lang=lang), float("nan"), None
-        used_psm = -1
-        try:
-            _, _, best_df = _ocr_pass(6)
-        except Exception:
-            best_df = None
-
-    words = []
-    if best_df is not None and len(best_df):
-        for _, row in best_df.iterrows():
-            text = str(row.get("text") or "").strip()
+        # One recognition per pass: text and word boxes both come from the word rows
+        if PyTessBaseAPI is not None:
+            rows = _api_words(prep, psm, allowlist, lang)
+        else:
+            rows = _tsv_words(tess_path or prep, cfg, lang)
+        confs: list[float] = []
+        words: dict[str, list] = {k: [] for k in WORD_FIELDS}
+        lines: list[str] = []
+        line_key = None
+        for text, conf, left, top, width, height, block, par, line, word in rows:
+            try:
+                conf = float(conf)
+            except (TypeError, ValueError):
+                continue
+            if conf == -1:
+                continue
+            confs.append(conf)
+            text = str(text or "").strip()
             if not text:
                 continue
             try:
-                words.append(
-                    {
-                        "text": text,
-                        "conf": float(row.get("conf", 0.0)),
-                        "left": int(row.get("left", 0)),
-                        "top": int(row.get("top", 0)),
-                        "width": int(row.get("width", 0)),
-                        "height": int(row.get("height", 0)),
-                        "block_num": int(row.get("block_num", 0)),
-                        "par_num": int(row.get("par_num", 0)),
-                        "line_num": int(row.get("line_num", 0)),
-                        "word_num": int(row.get("word_num", 0)),
-                    }
-                )
+                row = (text, conf, int(left), int(top), int(width), int(height), int(block), int(par), int(line), int(word))
+            except (TypeError, ValueError):
+                continue
+            for col, val in zip(words.values(), row):
+                col.append(val)
+            key = (block, par, line)
+            if key != line_key:
+                if line_key is not None and key[:2] != line_key[:2]:
+                    lines.append("")  # blank line between paragraphs, like image_to_string
+                lines.append(text)
+                line_key = key
+            else:
+                lines[-1] += " " + text
+        mean_conf = sum(confs) / len(confs) if confs else float("nan")
+        return "\n".join(lines), mean_conf, words
+
+    # All PSM variants plus the amount pass are independent: submit them together. The amount
+    # pass is always needed, so it goes right after the first PSM instead of behind the sweep.
+    first_psm, *rest_psms = _FULL_PAGE_PSMS
+    pending = {_TESS_POOL.submit(_ocr_pass, first_psm): first_psm}
+    # The amount pass only feeds text to the parser, so skip the TSV/word rows for it
+    amt_future = _TESS_POOL.submit(_tess, tess_path or prep, 6, "0123456789.,?PHPPhp ", lang)
+    pending.update({_TESS_POOL.submit(_ocr_pass, psm): psm for psm in rest_psms})
+    if tess_path:
+        _unlink_when_done(tess_path, [*pending, amt_future])
+
+    tries = []
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            psm = pending.pop(fut)
+            try:
+                t, c, w = fut.result()
+                tries.append((c, t, psm, w))
             except Exception:
                 continue
+        if any(c >= TESSERACT_EARLY_EXIT_CONF for c, *_ in tries):
+            for fut in pending:
+                fut.cancel()  # passes already running finish in the background
+            break
 
-    amt_text, _, _ = _ocr_pass(6, allowlist="0123456789.,?PHPPhp ")
+    if tries:
+        c, t, used_psm, words = max(tries, key=lambda x: x[0])
+    else:
+        t, c, words = pytesseract.image_to_string(prep, lang=lang), float("nan"), {}
+        used_psm = -1
+
+    amt_text = amt_future.result()
 
     return {
         "text": t,
@@ -138,16 +317,16 @@ def ocr_image_path(path: str, lang: str = DEF_LANG) -> dict:
     return ocr_image_bytes(data, lang=lang)
 
 
-def ocr_crop(img_bgr, box, psm=7, allowlist=None, lang=DEF_LANG):
+def _prep_crop(img_bgr, box) -> np.ndarray | None:
     x1, y1, x2, y2 = box
-    crop = img_bgr[y1:y2, x1:x2].copy()
+    crop = img_bgr[y1:y2, x1:x2]
     if crop.size == 0:
-        return ""
+        return None
 
     crop = cv2.resize(crop, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
 
     gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
-    gray = cv2.bilateralFilter(gray, 9, 75, 75)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
     th = cv2.adaptiveThreshold(
         gray,
         255,
@@ -156,7 +335,14 @@ def ocr_crop(img_bgr, box, psm=7, allowlist=None, lang=DEF_LANG):
         31,
         9,
     )
+    return th
+
 
+def _tess(th: np.ndarray | str, psm: int, allowlist: str | None, lang: str) -> str:
+    if PyTessBaseAPI is not None:
+        with _tess_api(lang) as api:
+            _api_recognize(api, th, psm, allowlist)
+            return api.GetUTF8Text().strip()
     cfg = f"--psm {psm}"
     if allowlist:
         cfg += f" -c tessedit_char_whitelist={allowlist}"
@@ -164,6 +350,13 @@ def ocr_crop(img_bgr, box, psm=7, allowlist=None, lang=DEF_LANG):
     return txt.strip()
 
 
+def ocr_crop(img_bgr, box, psm=7, allowlist=None, lang=DEF_LANG):
+    th = _prep_crop(img_bgr, box)
+    if th is None:
+        return ""
+    return _tess(th, psm, allowlist, lang)
+
+
 def ocr_amount_from_crop(img_bgr, box, lang: str = DEF_LANG):
     """
     Run multiple OCR passes on the detected total region and extract the most confident amount.
@@ -173,32 +366,41 @@ def ocr_amount_from_crop(img_bgr, box, lang: str = DEF_LANG):
     best_val: float | None = None
     best_text: str = ""
 
-    for psm in (7, 6, 5, 11):
-        for allow in ("0123456789.,₱PHPphp ", None):
-            txt = ocr_crop(img_bgr, box, psm=psm, allowlist=allow, lang=lang)
-            if not txt:
+    th = _prep_crop(img_bgr, box)  # same binarized crop for every pass
+    if th is None:
+        return best_val, best_text, tried
+
+    # Eight independent tesseract runs: fan out, then scan the texts in the original pass order
+    futures = [
+        _TESS_POOL.submit(_tess, th, psm, allow, lang)
+        for psm in (7, 6, 5, 11)
+        for allow in ("0123456789.,₱PHPphp ", None)
+    ]
+    for fut in futures:
+        txt = fut.result()
+        if not txt:
+            continue
+        cleaned = (
+            txt.replace("PHP", "")
+            .replace("Php", "")
+            .replace("php", "")
+            .replace("₱", "")
+            .strip()
+        )
+        tried.append(cleaned)
+        for match in AMOUNT_RE.finditer(cleaned):
+            try:
+                val = float(match.group(1).replace(",", ""))
+            except Exception:
                 continue
-            cleaned = (
-                txt.replace("PHP", "")
-                .replace("Php", "")
-                .replace("php", "")
-                .replace("₱", "")
-                .strip()
-            )
-            tried.append(cleaned)
-            for match in AMOUNT_RE.finditer(cleaned):
-                try:
-                    val = float(match.group(1).replace(",", ""))
-                except Exception:
-                    continue
-                candidate_len = len(match.group(1))
-                current_len = len(f"{best_val}") if best_val is not None else 0
-                if (
-                    best_val is None
-                    or candidate_len > current_len
-                    or val > (best_val or 0)
-                ):
-                    best_val = val
-                    best_text = cleaned
+            candidate_len = len(match.group(1))
+            current_len = len(f"{best_val}") if best_val is not None else 0
+            if (
+                best_val is None
+                or candidate_len > current_len
+                or val > (best_val or 0)
+            ):
+                best_val = val
+                best_text = cleaned
 
     return best_val, best_text, tried
@@ -1,13 +1,35 @@
 from __future__ import annotations
 
 import io
-from typing import Any, Dict, List
+import logging
+import os
+from typing import Any, Dict, List, Sequence, Tuple
 
+import numpy as np
 from PIL import Image
 
+# Inference backend. PaddleOCR takes fp32/fp16 precision; fp16 only pays off with TensorRT on GPU.
+PADDLE_VL_DEVICE = os.getenv("PADDLE_VL_DEVICE", "").strip()  # e.g. "cpu", "gpu:0"; empty = paddle's default
+PADDLE_VL_TENSORRT = os.getenv("PADDLE_VL_TENSORRT", "false").lower() == "true"
+PADDLE_VL_PRECISION = os.getenv("PADDLE_VL_PRECISION", "fp16" if PADDLE_VL_TENSORRT else "fp32")
+PADDLE_VL_CPU_THREADS = int(os.getenv("PADDLE_VL_CPU_THREADS", str(os.cpu_count() or 4)))
+PADDLE_VL_MKLDNN = os.getenv("PADDLE_VL_MKLDNN", "true").lower() == "true"
+
 _PIPELINE = None
 
 
+def _pipeline_kwargs() -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"cpu_threads": PADDLE_VL_CPU_THREADS, "enable_mkldnn": PADDLE_VL_MKLDNN}
+    if PADDLE_VL_MKLDNN:
+        kwargs["mkldnn_cache_capacity"] = 10
+    if PADDLE_VL_DEVICE:
+        kwargs["device"] = PADDLE_VL_DEVICE
+    if PADDLE_VL_TENSORRT:
+        kwargs["use_tensorrt"] = True
+        kwargs["precision"] = PADDLE_VL_PRECISION
+    return kwargs
+
+
 def _load_pipeline():
     global _PIPELINE
     if _PIPELINE is None:
@@ -17,10 +39,20 @@ def _load_pipeline():
             raise RuntimeError(
                 "paddleocr is not installed. Install PaddleOCR-VL to enable this strategy."
             ) from exc
-        _PIPELINE = PaddleOCRVL()
+        try:
+            _PIPELINE = PaddleOCRVL(**_pipeline_kwargs())
+        except (TypeError, ValueError):
+            # Older paddleocr builds reject some of the backend options
+            logging.exception("PaddleOCRVL backend options rejected; loading with defaults")
+            _PIPELINE = PaddleOCRVL()
     return _PIPELINE
 
 
+def warmup() -> None:
+    """Load the pipeline at boot so the first upload doesn't pay model load and JIT setup."""
+    _load_pipeline()
+
+
 def _collect_texts(obj: Any, out: List[str]) -> None:
     if isinstance(obj, dict):
         for k, v in obj.items():
@@ -33,9 +65,14 @@ def _collect_texts(obj: Any, out: List[str]) -> None:
             _collect_texts(item, out)
 
 
-def paddle_vl_text(image_bytes: bytes, prompt: str | None = None) -> Dict[str, Any]:
+def paddle_vl_text(
+    image_bytes: bytes | None = None,
+    prompt: str | None = None,
+    image_bgr: np.ndarray | None = None,
+) -> Dict[str, Any]:
     """
     Run PaddleOCR-VL locally and return a text blob compatible with parse_fields.
+    Pass either encoded image_bytes or an already-decoded BGR array (e.g. a crop view).
     """
     try:
         pipeline = _load_pipeline()
@@ -43,7 +80,10 @@ def paddle_vl_text(image_bytes: bytes, prompt: str | None = None) -> Dict[str, A
         return {"ok": False, "text": "", "error": f"load:{exc}"}
 
     try:
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        if image_bgr is not None:
+            img = Image.fromarray(np.ascontiguousarray(image_bgr[..., ::-1]))
+        else:
+            img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
     except Exception as exc:
         return {"ok": False, "text": "", "error": f"decode:{exc}"}
 
@@ -55,6 +95,10 @@ def paddle_vl_text(image_bytes: bytes, prompt: str | None = None) -> Dict[str, A
     except Exception as exc:
         return {"ok": False, "text": "", "error": f"infer:{exc}"}
 
+    return _payload_from_results(results)
+
+
+def _payload_from_results(results) -> Dict[str, Any]:
     texts: List[str] = []
     for res in results:
         payload = res.to_dict() if hasattr(res, "to_dict") else {}
@@ -62,3 +106,45 @@ def paddle_vl_text(image_bytes: bytes, prompt: str | None = None) -> Dict[str, A
 
     merged = "\n".join(texts).strip()
     return {"ok": bool(merged), "text": merged, "error": None}
+
+
+def paddle_vl_text_batch(items: Sequence[Tuple[np.ndarray, str]]) -> List[Dict[str, Any]]:
+    """
+    Run several prompted BGR crops through a single predict call (one backbone pass).
+    Returns one paddle_vl_text-style payload per (image_bgr, prompt) item, in order.
+    """
+    if not items:
+        return []
+    try:
+        pipeline = _load_pipeline()
+    except Exception as exc:
+        return [{"ok": False, "text": "", "error": f"load:{exc}"} for _ in items]
+
+    out: List[Dict[str, Any] | None] = [None] * len(items)
+    inputs: List[Dict[str, Any]] = []
+    slots: List[int] = []
+    for i, (image_bgr, prompt) in enumerate(items):
+        try:
+            img = Image.fromarray(np.ascontiguousarray(image_bgr[..., ::-1]))
+        except Exception as exc:
+            out[i] = {"ok": False, "text": "", "error": f"decode:{exc}"}
+            continue
+        inputs.append({"image": img, "prompt": prompt})
+        slots.append(i)
+
+    if inputs:
+        try:
+            results = list(pipeline.predict(inputs))
+        except Exception as exc:
+            results = None
+            for i in slots:
+                out[i] = {"ok": False, "text": "", "error": f"infer:{exc}"}
+        if results is not None and len(results) == len(inputs):
+            for i, res in zip(slots, results):
+                out[i] = _payload_from_results([res])
+        elif results is not None:
+            # Can't tell which result belongs to which crop; run them one at a time
+            for i in slots:
+                image_bgr, prompt = items[i]
+                out[i] = paddle_vl_text(prompt=prompt, image_bgr=image_bgr)
+    return out  # type: ignore[return-value]
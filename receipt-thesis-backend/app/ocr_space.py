@@ -1,5 +1,6 @@
 from __future__ import annotations
-import os, io, math
+import os, io, math, time, asyncio
+from typing import Optional
 import httpx
 from PIL import Image
 
@@ -9,15 +10,87 @@ OCR_ENABLED = os.getenv("OCR_SPACE_ENABLED", "false").lower() == "true"
 
 MAX_BYTES = 1_000_000  # hard cap ~1MB for OCR.space free tier
 
+# Retry / pacing for transient failures (429, 5xx, "rate limit" style API errors)
+MAX_ATTEMPTS = max(1, int(os.getenv("OCR_SPACE_MAX_ATTEMPTS", "3")))
+RETRY_BASE_DELAY = float(os.getenv("OCR_SPACE_RETRY_BASE", "1.0"))  # seconds, doubled per attempt
+RETRY_MAX_DELAY = float(os.getenv("OCR_SPACE_RETRY_MAX", "8.0"))
+MIN_INTERVAL = float(os.getenv("OCR_SPACE_MIN_INTERVAL", "0.0"))  # seconds between dispatches
+RETRY_STATUS = {429, 500, 502, 503, 504}
+RETRY_HINTS = ("rate limit", "quota", "too many", "timed out", "timeout", "temporarily")
+
+
+class _RateLimiter:
+    """Enforce a minimum interval between consecutive OCR.space dispatches."""
+
+    def __init__(self, min_interval: float) -> None:
+        self.min_interval = min_interval
+        self._last = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if self.min_interval <= 0:
+            return
+        async with self._lock:
+            delta = self._last + self.min_interval - time.monotonic()
+            if delta > 0:
+                await asyncio.sleep(delta)
+            self._last = time.monotonic()
+
+
+_RATE_LIMITER = _RateLimiter(MIN_INTERVAL)
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+try:  # optional: h2 lets concurrent jobs multiplex one TLS connection
+    import h2  # type: ignore  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:  # pragma: no cover - optional dependency
+    _HTTP2 = False
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Shared client so retries and concurrent jobs reuse pooled TLS connections."""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=90,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+    return _CLIENT
+
+
+async def aclose_client() -> None:
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+def _retry_delay(attempt: int) -> float:
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+
+
+def _is_transient(http_code: int | None, message: str) -> bool:
+    if http_code in RETRY_STATUS:
+        return True
+    low = (message or "").lower()
+    return any(h in low for h in RETRY_HINTS)
+
 def _maybe_downscale(img_bytes: bytes) -> bytes:
     if len(img_bytes) <= MAX_BYTES:
         return img_bytes
     try:
-        im = Image.open(io.BytesIO(img_bytes)).convert("RGB")
+        im = Image.open(io.BytesIO(img_bytes))
         scale = math.sqrt(MAX_BYTES / len(img_bytes))
         new_w = max(600, int(im.width * scale))
         new_h = max(600, int(im.height * scale))
-        im = im.resize((new_w, new_h))
+        if im.format == "JPEG":
+            # libjpeg scales by 1/2, 1/4 or 1/8 during decode, never going below the requested size
+            im.draft("RGB", (new_w, new_h))
+        im = im.convert("RGB")
+        if im.size != (new_w, new_h):
+            im = im.resize((new_w, new_h))
         out = io.BytesIO()
         im.save(out, format="JPEG", quality=85, optimize=True)
         out_bytes = out.getvalue()
@@ -35,20 +108,43 @@ async def ocr_space_bytes(img_bytes: bytes, filename: str = "receipt.jpg", lang:
     headers = {"apikey": OCR_KEY}
     files = {"file": (filename, send_bytes, "application/octet-stream")}
 
-    try:
-        async with httpx.AsyncClient(timeout=90) as client:
-            r = await client.post(OCR_URL, data=data, headers=headers, files=files)
+    j = None
+    http_code = None
+    for attempt in range(MAX_ATTEMPTS):
+        last_attempt = attempt + 1 >= MAX_ATTEMPTS
+        await _RATE_LIMITER.wait()
+        try:
+            r = await _get_client().post(OCR_URL, data=data, headers=headers, files=files)
             http_code = r.status_code
-            j = r.json()
-    except Exception as e:
-        return {"ok": False, "text": "", "raw": None, "error": f"network:{e}", "http": None}
+            try:
+                j = r.json()
+            except ValueError:
+                j = None
+        except Exception as e:
+            if not last_attempt and isinstance(e, httpx.TransportError):
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+            return {"ok": False, "text": "", "raw": None, "error": f"network:{e}", "http": None}
+
+        api_msg = ""
+        if isinstance(j, dict) and j.get("IsErroredOnProcessing"):
+            api_msg = str(j.get("ErrorMessage") or j.get("ErrorDetails") or "")
+        if not last_attempt and (
+            _is_transient(http_code, api_msg) or (j is None and http_code in RETRY_STATUS)
+        ):
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+        break
+
+    if not isinstance(j, dict):
+        return {"ok": False, "text": "", "raw": None, "error": f"http:{http_code}", "http": http_code}
 
     text = ""
-    if isinstance(j, dict) and j.get("ParsedResults"):
+    if j.get("ParsedResults"):
         text = "\n".join(pr.get("ParsedText", "") for pr in j["ParsedResults"]).strip()
 
     err = None
-    if isinstance(j, dict) and j.get("IsErroredOnProcessing"):
+    if j.get("IsErroredOnProcessing"):
         err = f"api:{j.get('ErrorMessage') or j.get('ErrorDetails') or 'unknown'}"
 
     ok = bool(text) and not j.get("IsErroredOnProcessing", False)
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional
 
 from .ocr import ocr_image_bytes, DEF_LANG
 from .ocr_space import ocr_space_bytes
 from .ocr_google import google_vision_text
 from .ocr_paddle_vl import paddle_vl_text
 
+# Sync engines (tesseract, paddle) get their own bounded pool so a burst of uploads can't
+# take every default-executor thread that DB and file I/O offloads also rely on.
+LOCAL_OCR_WORKERS = max(1, int(os.getenv("LOCAL_OCR_WORKERS", str(os.cpu_count() or 4))))
+_OCR_EXEC = ThreadPoolExecutor(max_workers=LOCAL_OCR_WORKERS, thread_name_prefix="ocr")
+
+
+async def run_local_ocr(fn, *args, **kwargs):
+    """Run a blocking local OCR call on the bounded OCR pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_OCR_EXEC, functools.partial(fn, *args, **kwargs))
+
 
 @dataclass
 class OCRResult:
@@ -45,12 +59,7 @@ class TesseractStrategy(OCRStrategy):
         filename: str,
         lang: str = DEF_LANG,
     ) -> OCRResult:
-        loop = asyncio.get_running_loop()
-
-        def _run():
-            return ocr_image_bytes(image_bytes, lang=lang)
-
-        payload = await loop.run_in_executor(None, _run)
+        payload = await run_local_ocr(ocr_image_bytes, image_bytes, lang=lang)
         payload.setdefault("filename", filename)
         return OCRResult(self.name, payload)
 
@@ -117,12 +126,7 @@ class PaddleVLStrategy(OCRStrategy):
                 self.name,
                 {"ok": False, "text": "", "error": "disabled"},
             )
-        loop = asyncio.get_running_loop()
-
-        def _run():
-            return paddle_vl_text(image_bytes)
-
-        payload = await loop.run_in_executor(None, _run)
+        payload = await run_local_ocr(paddle_vl_text, image_bytes)
         payload.setdefault("filename", filename)
         return OCRResult(self.name, payload)
 
@@ -146,3 +150,55 @@ class OCRContext:
     ) -> OCRResult:
         strategy = self._strategies[name]
         return await strategy.recognize(image_bytes=image_bytes, filename=filename, lang=lang)
+
+    def enabled_names(self) -> list[str]:
+        return [n for n, s in self._strategies.items() if getattr(s, "enabled", True)]
+
+    async def run_all(
+        self,
+        *,
+        image_bytes: bytes,
+        filename: str,
+        lang: str = DEF_LANG,
+        names: Optional[Iterable[str]] = None,
+    ) -> Dict[str, OCRResult | BaseException]:
+        """Run the given (default: all enabled) strategies concurrently, keyed by name.
+
+        A strategy that raises maps to its exception instead of failing the others.
+        """
+        names = list(self.enabled_names() if names is None else names)
+        results = await asyncio.gather(
+            *(self.run(n, image_bytes=image_bytes, filename=filename, lang=lang) for n in names),
+            return_exceptions=True,
+        )
+        return dict(zip(names, results))
+
+    async def first_successful(
+        self,
+        *,
+        image_bytes: bytes,
+        filename: str,
+        lang: str = DEF_LANG,
+        names: Optional[Iterable[str]] = None,
+    ) -> Optional[OCRResult]:
+        """Return the first strategy result that succeeds and cancel the rest.
+
+        Payloads without an "ok" flag (tesseract) count as successful when they carry text.
+        """
+        names = list(self.enabled_names() if names is None else names)
+        tasks = [
+            asyncio.create_task(self.run(n, image_bytes=image_bytes, filename=filename, lang=lang))
+            for n in names
+        ]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                try:
+                    result = await fut
+                except Exception:
+                    continue
+                if result.payload.get("ok", bool(result.payload.get("text"))):
+                    return result
+            return None
+        finally:
+            for t in tasks:
+                t.cancel()
@@ -1,10 +1,14 @@
 import re
 import statistics
-from typing import Tuple, Optional, List, Dict
+from functools import lru_cache
+from itertools import groupby
+from typing import Tuple, Optional, List, Dict, Iterable, Iterator, Sequence, Union
+import numpy as np
 from dateutil import parser as dtparser
 
 # ------------ Amount parsing config ------------
-AMT = r"(?:₱|PHP|Php|php)?\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})|[0-9]+(?:\.[0-9]{2}))"
+AMT_NUM = r"([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})|[0-9]+(?:\.[0-9]{2}))"
+AMT = r"(?:₱|PHP|Php|php)?\s*" + AMT_NUM
 
 # High-priority tokens that usually mean THE total to pay
 TOTAL_KEYS = [
@@ -21,7 +25,25 @@ LOW_PRIORITY_KEYS = [
 
 SKIP_STORE = {"receipt","invoice","official","sales","or#","tin","vat","pos","cashier","terminal"}
 
-_def_amt = re.compile(AMT)
+DUE_HINTS = ("due", "payable", "amount due", "amount payable", "pay")
+
+
+def _any_of(keys) -> "re.Pattern[str]":
+    """One alternation for 'any(k in low for k in keys)': a single C-level scan per line."""
+    return re.compile("|".join(re.escape(k) for k in sorted(keys, key=len, reverse=True)))
+
+
+# Matched against already-lowercased text, like the substring checks they replace
+_TOTAL_RE = _any_of(TOTAL_KEYS)
+_LOW_RE = _any_of(LOW_PRIORITY_KEYS)
+_DUE_RE = _any_of(DUE_HINTS)
+_SKIP_STORE_RE = _any_of(SKIP_STORE)
+
+# Only group(1) is ever read, and the optional currency prefix never changes where
+# it starts, so scan for the number alone: the lookahead rejects non-digit positions
+# without trying the prefix alternatives at each one (same groups, ~3x faster).
+_def_amt = re.compile(r"(?=[0-9])" + AMT_NUM)
+_non_amount_chars = re.compile(r"[^0-9.,]")
 _word = re.compile(r"[A-Za-z][A-Za-z\-&' ]{2,}")
 _currency = re.compile(r"(?:php|₱|php\.|peso|amount:)", re.IGNORECASE)
 
@@ -32,11 +54,25 @@ DATE_PATTERNS = [
     r"(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})",                          # MM/DD/YYYY or DD/MM/YYYY
     r"((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4})",  # 10 Sep 2025
 ]
+_DATE_HINT_RE = _any_of(DATE_HINTS)
+_DATE_RES = [re.compile(p, re.IGNORECASE) for p in DATE_PATTERNS]
+# Gate only: the patterns keep their priority order, this just skips text without any date shape
+_DATE_ANY_RE = re.compile("|".join(DATE_PATTERNS), re.IGNORECASE)
 
 # ------------ Helpers ------------
 def _norm(s: str) -> str:
     return re.sub(r"\s{2,}", " ", s or "").strip()
 
+@lru_cache(maxsize=8)
+def _text_lines(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Non-empty stripped lines of text and their lowercase forms.
+
+    parse_fields runs the store, total and date extractors over the same OCR text,
+    so the split (and lowercasing) is done once and shared.
+    """
+    lines = tuple(l.strip() for l in text.splitlines() if l.strip())
+    return lines, tuple(l.lower() for l in lines)
+
 def _amounts_in_text(text: str) -> List[float]:
     vals: List[float] = []
     for m in _def_amt.finditer(text):
@@ -47,8 +83,7 @@ def _amounts_in_text(text: str) -> List[float]:
     return vals
 
 def _is_low_priority_line(s: str) -> bool:
-    low = s.lower()
-    return any(k in low for k in LOW_PRIORITY_KEYS)
+    return _LOW_RE.search(s.lower()) is not None
 
 def _line_currency_score(line: str) -> float:
     return 1.0 if _currency.search(line) else 0.0
@@ -56,49 +91,75 @@ def _line_currency_score(line: str) -> float:
 def _line_totalish_score(line: str) -> float:
     low = line.lower()
     score = 0.0
-    if any(k in low for k in TOTAL_KEYS):
+    if _TOTAL_RE.search(low):
         score += 4.0
-    if any(k in low for k in ("due", "payable", "amount due", "amount payable", "pay")):
+    if _DUE_RE.search(low):
         score += 1.5
     return score
 
-def _score_amount_candidate(idx: int, line: str, value: float, lines: List[str]) -> float:
+def _score_amount_candidate(
+    idx: int, value: float, totalish: List[float], currency: List[float], low_prio: List[bool]
+) -> float:
+    """Score one amount on line idx from per-line scores computed once by the caller."""
+    n = len(totalish)
     score = 0.0
-    score += _line_totalish_score(line)
-    score += _line_currency_score(line)
+    score += totalish[idx]
+    score += currency[idx]
 
     # Look at neighbors for supporting hints.
-    if idx + 1 < len(lines):
-        score += 0.8 * _line_totalish_score(lines[idx + 1])
-        score += 0.4 * _line_currency_score(lines[idx + 1])
+    if idx + 1 < n:
+        score += 0.8 * totalish[idx + 1]
+        score += 0.4 * currency[idx + 1]
     if idx > 0:
-        score += 0.6 * _line_totalish_score(lines[idx - 1])
-        score += 0.3 * _line_currency_score(lines[idx - 1])
+        score += 0.6 * totalish[idx - 1]
+        score += 0.3 * currency[idx - 1]
 
     # Prefer amounts near the bottom of the receipt.
-    if len(lines) > 0:
-        rel_pos = idx / len(lines)
+    if n > 0:
+        rel_pos = idx / n
         score += max(0.0, 2.0 * (1.0 - rel_pos))  # bottom lines earn up to +2
 
     # Light preference for numerically larger totals without letting them dominate.
     score += min(value, 50000.0) / 20000.0
 
-    if _is_low_priority_line(line):
+    if low_prio[idx]:
         score -= 3.0
     return score
 
-def _best_amount(lines: List[str]) -> Optional[float]:
+def _line_features(
+    lines: Sequence[str], lows: Optional[Sequence[str]] = None
+) -> Tuple[List[float], List[float], List[bool]]:
+    """Per-line (totalish, currency, low_prio) in one pass; lows are the lowercased lines."""
+    totalish: List[float] = []
+    currency: List[float] = []
+    low_prio: List[bool] = []
+    if lows is None:
+        lows = [line.lower() for line in lines]
+    for line, low in zip(lines, lows):
+        score = 0.0
+        if _TOTAL_RE.search(low):
+            score += 4.0
+        if _DUE_RE.search(low):
+            score += 1.5
+        totalish.append(score)
+        currency.append(_line_currency_score(line))
+        low_prio.append(_LOW_RE.search(low) is not None)
+    return totalish, currency, low_prio
+
+def _best_amount(lines: Sequence[str], lows: Optional[Sequence[str]] = None) -> Optional[float]:
     best_val = None
     best_score = float("-inf")
+    totalish, currency, low_prio = _line_features(lines, lows)
     for idx, line in enumerate(lines):
-        if _is_low_priority_line(line):
+        # Every amount needs a ".dd" part; most item/header lines have no dot at all
+        if low_prio[idx] or "." not in line:
             continue
         for match in _def_amt.finditer(line):
             try:
                 val = float(match.group(1).replace(",", ""))
             except Exception:
                 continue
-            score = _score_amount_candidate(idx, line, val, lines)
+            score = _score_amount_candidate(idx, val, totalish, currency, low_prio)
             # Tie-breaker: prefer larger value when score equal.
             if score > best_score or (abs(score - best_score) < 1e-6 and (best_val is None or val > best_val)):
                 best_score = score
@@ -106,24 +167,41 @@ def _best_amount(lines: List[str]) -> Optional[float]:
     return best_val
 
 # ------------ Total extraction (layout-aware then text-only) ------------
-def extract_total_layout(words: List[Dict], full_text: str) -> Optional[float]:
+_WORD_FIELDS = ("text", "conf", "left", "top", "width", "height", "block_num", "par_num", "line_num", "word_num")
+_WORD_DEFAULTS = ("", 0.0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+
+def _word_rows(words: Union[Dict[str, list], List[Dict]]) -> Iterator[tuple]:
+    """Yield word tuples in _WORD_FIELDS order from columnar words or a list of word dicts."""
+    if isinstance(words, dict):
+        n = len(words.get("text") or ())
+        yield from zip(*(words.get(k) or [d] * n for k, d in zip(_WORD_FIELDS, _WORD_DEFAULTS)))
+    else:
+        for w in words:
+            yield tuple(w.get(k, d) for k, d in zip(_WORD_FIELDS, _WORD_DEFAULTS))
+
+
+def extract_total_layout(words: Union[Dict[str, list], List[Dict]], full_text: str) -> Optional[float]:
     """
     Prefer numbers near TOTAL-like tokens using bounding boxes from pytesseract output.
     """
     if not words:
         return extract_total_textonly(full_text)
+    # zip() would silently pair words with another word's box if columns are ragged
+    if isinstance(words, dict) and len({len(v) for v in words.values() if v}) > 1:
+        return extract_total_textonly(full_text)
 
     tokens = []
-    for w in words:
-        text = str(w.get("text") or "").strip()
+    for text, conf, left, top, width, height, block_num, par_num, line_num, word_num in _word_rows(words):
+        text = str(text or "").strip()
         if not text:
             continue
         try:
-            left = int(w.get("left", 0))
-            top = int(w.get("top", 0))
-            width = max(int(w.get("width", 0)), 1)
-            height = max(int(w.get("height", 0)), 1)
-            conf = float(w.get("conf", 0.0))
+            left = int(left)
+            top = int(top)
+            width = max(int(width), 1)
+            height = max(int(height), 1)
+            conf = float(conf)
             if conf != conf:  # NaN guard
                 conf = 0.0
             token = {
@@ -133,10 +211,13 @@ def extract_total_layout(words: List[Dict], full_text: str) -> Optional[float]:
                 "top": top,
                 "width": width,
                 "height": height,
-                "block_num": int(w.get("block_num", 0)),
-                "par_num": int(w.get("par_num", 0)),
-                "line_num": int(w.get("line_num", 0)),
-                "word_num": int(w.get("word_num", 0)),
+                "block_num": int(block_num),
+                "par_num": int(par_num),
+                "line_num": int(line_num),
+                "word_num": int(word_num),
+                "seq": len(tokens),
+                # digits/separators only, matched against amounts in _tokens_for_amount
+                "amount_chars": _non_amount_chars.sub("", text),
             }
             token["right"] = token["left"] + token["width"]
             token["bottom"] = token["top"] + token["height"]
@@ -149,38 +230,43 @@ def extract_total_layout(words: List[Dict], full_text: str) -> Optional[float]:
     if not tokens:
         return extract_total_textonly(full_text)
 
-    line_map: Dict[tuple, List[Dict]] = {}
-    for tok in tokens:
-        key = (tok["block_num"], tok["par_num"], tok["line_num"])
-        line_map.setdefault(key, []).append(tok)
-
-    ordered_keys = sorted(
-        line_map.keys(),
-        key=lambda k: (
-            min(t["top"] for t in line_map[k]),
-            min(t["left"] for t in line_map[k]),
-        ),
-    )
+    # One sort groups tokens into Tesseract lines, left to right (stable, so ties keep
+    # input order); extents are gathered in the same pass over each group.
+    def _line_key(t: Dict) -> tuple:
+        return (t["block_num"], t["par_num"], t["line_num"])
+
+    tokens.sort(key=lambda t: (t["block_num"], t["par_num"], t["line_num"], t["left"]))
+    lines = []
+    for _, grp in groupby(tokens, key=_line_key):
+        line_tokens = list(grp)
+        first = line_tokens[0]
+        x_min, x_max = first["left"], first["right"]
+        y_top, y_bottom = first["top"], first["bottom"]
+        seq = first["seq"]
+        for t in line_tokens:
+            x_max = max(x_max, t["right"])
+            y_top = min(y_top, t["top"])
+            y_bottom = max(y_bottom, t["bottom"])
+            seq = min(seq, t["seq"])
+        # x_min is first["left"]: the group is already sorted by left
+        lines.append((y_top, x_min, seq, x_max, y_bottom, line_tokens))
+    # Top-to-bottom reading order; seq keeps the old first-seen order on exact ties
+    lines.sort(key=lambda ln: ln[:3])
 
     line_infos: List[Dict] = []
     all_heights: List[int] = []
 
-    for idx, key in enumerate(ordered_keys):
-        line_tokens = sorted(line_map[key], key=lambda t: t["left"])
-        if not line_tokens:
-            continue
-        line_text = " ".join(_norm(t["text"]) for t in line_tokens if _norm(t["text"]))
-        x_min = min(t["left"] for t in line_tokens)
-        x_max = max(t["right"] for t in line_tokens)
-        y_top = min(t["top"] for t in line_tokens)
-        y_bottom = max(t["bottom"] for t in line_tokens)
+    for idx, (y_top, x_min, _, x_max, y_bottom, line_tokens) in enumerate(lines):
+        line_text = " ".join(n for n in (_norm(t["text"]) for t in line_tokens) if n)
         all_heights.extend(t["height"] for t in line_tokens if t["height"] > 0)
-        total_tokens = [
-            t for t in line_tokens if any(k in t["text"].lower() for k in TOTAL_KEYS)
-        ]
+        total_tokens = [t for t in line_tokens if _TOTAL_RE.search(t["text"].lower())]
         line_infos.append({
             "index": idx,
             "text": line_text,
+            "totalish": _line_totalish_score(line_text),
+            "currency": _line_currency_score(line_text),
+            "low_prio": _is_low_priority_line(line_text),
+            "has_total": bool(_TOTAL_RE.search(line_text.lower())),
             "tokens": line_tokens,
             "y_top": y_top,
             "y_bottom": y_bottom,
@@ -197,25 +283,22 @@ def extract_total_layout(words: List[Dict], full_text: str) -> Optional[float]:
     median_height = median_height or 1.0
     line_count = len(line_infos)
 
-    tot_lines = [
-        info for info in line_infos if any(k in info["text"].lower() for k in TOTAL_KEYS)
-    ]
+    tot_lines = [info for info in line_infos if info["has_total"]]
 
     def _tokens_for_amount(line_tokens: List[Dict], match_str: str) -> List[Dict]:
-        target = re.sub(r"[^0-9.,]", "", match_str)
+        target = _non_amount_chars.sub("", match_str)
         if not target:
             return [tok for tok in line_tokens if any(ch.isdigit() for ch in tok["text"])]
-        acc = ""
+        # Walk target with a pointer: a token is taken when its digits continue the
+        # amount at pos, noisy tokens in between are skipped (no string building).
+        pos = 0
         selected: List[Dict] = []
         for tok in line_tokens:
-            cleaned = re.sub(r"[^0-9.,]", "", tok["text"])
-            if not cleaned:
-                continue
-            candidate = acc + cleaned
-            if target.startswith(candidate):
+            seg = tok["amount_chars"]
+            if seg and target.startswith(seg, pos):
                 selected.append(tok)
-                acc = candidate
-                if acc == target:
+                pos += len(seg)
+                if pos == len(target):
                     break
         if not selected:
             selected = [tok for tok in line_tokens if any(ch.isdigit() for ch in tok["text"])]
@@ -254,77 +337,66 @@ def extract_total_layout(words: List[Dict], full_text: str) -> Optional[float]:
     if not candidates:
         return extract_total_textonly(full_text)
 
-    def _candidate_score(cand: Dict) -> float:
-        line = cand["line"]
-        idx = line["index"]
-        score = 0.0
-        score += _line_totalish_score(line["text"]) * 1.2
-        score += _line_currency_score(line["text"])
-
-        conf = cand.get("conf", 0.0)
-        if conf == conf:
-            score += min(conf, 95.0) / 25.0
-
-        height_ratio = cand.get("avg_height", median_height) / (median_height or 1.0)
-        if height_ratio > 1.1:
-            score += min(height_ratio - 1.0, 2.5)
-
-        if line_count > 1:
-            rel_pos = idx / (line_count - 1)
-        else:
-            rel_pos = 1.0
-        score += max(0.0, 2.2 * (1.0 - rel_pos))
-
-        if tot_lines:
-            best_prox = -5.0
-            for tot_line in tot_lines:
-                diff_idx = abs(idx - tot_line["index"])
-                base = 0.0
-                if diff_idx == 0:
-                    base = 6.0
-                elif diff_idx == 1:
-                    base = 4.5
-                elif diff_idx == 2:
-                    base = 3.0
-                else:
-                    base = max(0.0, 3.0 - 0.7 * diff_idx)
-                vert_gap = abs(cand["center_y"] - tot_line["y_mid"]) / (median_height or 1.0)
-                base -= min(vert_gap, 4.0)
-                centers = tot_line["total_centers"] or [tot_line["x_mid"]]
-                horiz_gap = min(abs(cand["center_x"] - cx) for cx in centers)
-                denom = max(cand["bbox"][2] - cand["bbox"][0], median_height)
-                base -= min(horiz_gap / denom, 4.0)
-                best_prox = max(best_prox, base)
-            score += best_prox
-
-        if _is_low_priority_line(line["text"]):
-            score -= 4.0
-
-        return score
-
-    best_candidate = max(candidates, key=_candidate_score, default=None)
-    if best_candidate is not None:
-        return best_candidate["value"]
-
-    return extract_total_textonly(full_text)
+    # Score every candidate at once: one row per candidate, one column per TOTAL line.
+    mh = median_height or 1.0
+    lines_of = [cand["line"] for cand in candidates]
+    idx = np.array([line["index"] for line in lines_of], dtype=np.float64)
+    center_x = np.array([cand["center_x"] for cand in candidates], dtype=np.float64)
+    center_y = np.array([cand["center_y"] for cand in candidates], dtype=np.float64)
+    width = np.array([cand["bbox"][2] - cand["bbox"][0] for cand in candidates], dtype=np.float64)
+    conf = np.array([cand["conf"] for cand in candidates], dtype=np.float64)
+    height_ratio = np.array([cand["avg_height"] for cand in candidates], dtype=np.float64) / mh
+
+    scores = np.zeros(len(candidates))
+    scores += np.array([line["totalish"] for line in lines_of]) * 1.2
+    scores += np.array([line["currency"] for line in lines_of])
+    scores += np.where(conf == conf, np.minimum(conf, 95.0) / 25.0, 0.0)
+    scores += np.where(height_ratio > 1.1, np.minimum(height_ratio - 1.0, 2.5), 0.0)
+
+    rel_pos = idx / (line_count - 1) if line_count > 1 else np.ones_like(idx)
+    scores += np.maximum(0.0, 2.2 * (1.0 - rel_pos))
+
+    if tot_lines:
+        tot_idx = np.array([t["index"] for t in tot_lines], dtype=np.float64)
+        tot_ymid = np.array([t["y_mid"] for t in tot_lines], dtype=np.float64)
+        # TOTAL-token centers of all TOTAL lines, flattened; seg_starts marks each line's run
+        centers = [t["total_centers"] or [t["x_mid"]] for t in tot_lines]
+        seg_starts = np.cumsum([0] + [len(c) for c in centers[:-1]])
+        flat_centers = np.array([cx for c in centers for cx in c], dtype=np.float64)
+
+        diff_idx = np.abs(idx[:, None] - tot_idx[None, :])
+        base = np.select(
+            [diff_idx == 0, diff_idx == 1, diff_idx == 2],
+            [6.0, 4.5, 3.0],
+            np.maximum(0.0, 3.0 - 0.7 * diff_idx),
+        )
+        base -= np.minimum(np.abs(center_y[:, None] - tot_ymid[None, :]) / mh, 4.0)
+        horiz_gap = np.minimum.reduceat(np.abs(center_x[:, None] - flat_centers[None, :]), seg_starts, axis=1)
+        denom = np.maximum(width, median_height)[:, None]
+        base -= np.minimum(horiz_gap / denom, 4.0)
+        scores += np.maximum(-5.0, base.max(axis=1))
+
+    scores -= np.array([4.0 if line["low_prio"] else 0.0 for line in lines_of])
+
+    # argmax keeps the first of equal scores, like max() over the candidate list
+    return candidates[int(np.argmax(scores))]["value"]
 
 def extract_total_textonly(text: str) -> Optional[float]:
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    lines, lows = _text_lines(text)
 
     # 1) Prefer lines with true total keywords, skipping payment/change lines
     for i, line in enumerate(lines):
-        if _is_low_priority_line(line):
+        if _LOW_RE.search(lows[i]):
             continue
-        low = line.lower()
-        if any(k in low for k in TOTAL_KEYS):
+        if _TOTAL_RE.search(lows[i]):
             m = _def_amt.search(line)
-            if not m and i + 1 < len(lines) and not _is_low_priority_line(lines[i + 1]):
+            if not m and i + 1 < len(lines) and not _LOW_RE.search(lows[i + 1]):
                 m = _def_amt.search(lines[i + 1])
             if m:
                 return float(m.group(1).replace(",", ""))
 
     # 2) Fallback: take the largest amount in the whole text (typical for itemized receipts)
-    best = _best_amount(lines)
+    best = _best_amount(lines, lows)
     if best is None:
         return None
     return best
@@ -332,12 +404,12 @@ def extract_total_textonly(text: str) -> Optional[float]:
 # ------------ Store extraction ------------
 def extract_store(text: str) -> Optional[str]:
     # Prefer first few lines with “wordy” content, avoid boilerplate tokens
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    lines, _ = _text_lines(text)
     for line in lines[:12]:
         cand = line.strip("-—:| ")
         if len(cand) < 3:
             continue
-        if any(k in cand.lower() for k in SKIP_STORE):
+        if _SKIP_STORE_RE.search(cand.lower()):
             continue
         if _word.search(cand):
             # Fix common OCR confusions
@@ -346,7 +418,10 @@ def extract_store(text: str) -> Optional[str]:
     return None
 
 # ------------ Date extraction ------------
+@lru_cache(maxsize=2048)
 def _try_parse_date(s: str) -> Optional[str]:
+    # Every DATE_PATTERNS match carries day, month and year, so dateutil never fills
+    # in today's date and the cached result can't go stale.
     try:
         dt = dtparser.parse(s, dayfirst=True, fuzzy=True)
         return dt.date().isoformat()
@@ -354,20 +429,23 @@ def _try_parse_date(s: str) -> Optional[str]:
         return None
 
 def extract_date(text: str) -> Optional[str]:
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    lines, lows = _text_lines(text)
     for i, line in enumerate(lines):
-        low = line.lower()
-        if any(h in low for h in DATE_HINTS):
+        if _DATE_HINT_RE.search(lows[i]):
             for look in (line, lines[i+1] if i+1 < len(lines) else ""):
-                for pat in DATE_PATTERNS:
-                    m = re.search(pat, look, re.IGNORECASE)
+                if not _DATE_ANY_RE.search(look):
+                    continue
+                for pat in _DATE_RES:
+                    m = pat.search(look)
                     if m:
                         iso = _try_parse_date(m.group(1))
                         if iso:
                             return iso
     # global fallback
-    for pat in DATE_PATTERNS:
-        m = re.search(pat, text, re.IGNORECASE)
+    if not _DATE_ANY_RE.search(text):
+        return None
+    for pat in _DATE_RES:
+        m = pat.search(text)
         if m:
             iso = _try_parse_date(m.group(1))
             if iso:
@@ -381,7 +459,9 @@ def parse_fields_from_ocr(rec: dict) -> Tuple[Optional[str], Optional[float], Op
     Expects rec like:
       {
         "text": "...",
-        "words": [{text, conf, left, top, width, height, block_num, par_num, line_num}, ...],
+        "words": {"text": [...], "conf": [...], "left": [...], ...},  # columnar, see ocr.WORD_FIELDS
+                 # (pytesseract image_to_data(output_type=Output.DICT) can be passed
+                 # as-is; a list of per-word dicts is accepted too)
         ...
       }
     """
@@ -398,3 +478,22 @@ def parse_fields_from_ocr(rec: dict) -> Tuple[Optional[str], Optional[float], Op
 # Backwards-compatible helper (used by existing code)
 def parse_fields(ocr_text: str) -> Tuple[Optional[str], Optional[float], Optional[str]]:
     return extract_store(ocr_text), extract_total_textonly(ocr_text), extract_date(ocr_text)
+
+def parse_fields_batch(
+    texts: Iterable[str],
+) -> Tuple[List[Optional[str]], List[Optional[float]], List[Optional[str]]]:
+    """
+    parse_fields over many texts, returned as (stores, totals, dates) columns.
+    Each distinct text is parsed once; duplicates (re-uploaded receipts) reuse it.
+    """
+    seen: Dict[str, Tuple[Optional[str], Optional[float], Optional[str]]] = {}
+    rows = []
+    for text in texts:
+        fields = seen.get(text)
+        if fields is None:
+            fields = seen[text] = parse_fields(text)
+        rows.append(fields)
+    if not rows:
+        return [], [], []
+    stores, totals, dates = zip(*rows)
+    return list(stores), list(totals), list(dates)
@@ -1,10 +1,16 @@
 from __future__ import annotations
 import re
-from typing import Optional, Tuple, Iterable
-import difflib
+from collections import Counter
 from functools import lru_cache
+from typing import Optional, Tuple, Iterable
+from rapidfuzz import fuzz  # installed with python-Levenshtein
 import Levenshtein as lev  # pip install python-Levenshtein
 
+try:
+    import ahocorasick  # optional: pip install pyahocorasick
+except Exception:
+    ahocorasick = None
+
 # ================= Canonical brand sets (UPPERCASE) =================
 FOOD_BRANDS = {
     "JOLLIBEE","MCDONALD","MCDONALD'S","KFC","CHOWKING","GREENWICH",
@@ -51,7 +57,46 @@ ALL_SETS = [
     ("Food", FOOD_BRANDS, FOOD_KW),
 ]
 
+# Brand -> category (first category in ALL_SETS wins, same as the old scan order)
+_BRAND_CATEGORY: dict[str, str] = {}
+for _cat, _brands, _ in ALL_SETS:
+    for _b in sorted(_brands):
+        _BRAND_CATEGORY.setdefault(_b, _cat)
+
+
+def _build_automaton():
+    """
+    One Aho-Corasick automaton over aliases, brands (uppercase) and category
+    keywords (lowercase). Payload is (kind, priority, category, word), with
+    priority being the ALL_SETS index used to break ties between categories.
+    """
+    if ahocorasick is None:
+        return None
+    rank = {cat: i for i, (cat, _, _) in enumerate(ALL_SETS)}
+    A = ahocorasick.Automaton()
+    for alias, canonical in ALIAS_MAP.items():
+        cat = _BRAND_CATEGORY.get(canonical)
+        if cat:
+            A.add_word(alias, ("alias", rank[cat], cat, canonical))
+    for brand, cat in _BRAND_CATEGORY.items():
+        if not A.exists(brand):
+            A.add_word(brand, ("brand", rank[cat], cat, brand))
+    for cat, _, kws in ALL_SETS:
+        for kw in kws:
+            if not A.exists(kw):
+                A.add_word(kw, ("kw", rank[cat], cat, kw))
+    A.make_automaton()
+    return A
+
+
+_AUTOMATON = _build_automaton()
+
 SPACES = re.compile(r"\s+")
+MULTI_SPACES = re.compile(r"\s{2,}")
+SEVEN_ELEVEN = re.compile(r"\b7\s*ELEVEN\b")
+NON_ALNUM = re.compile(r"[^A-Z0-9]")
+LEADING_NON_ALPHA = re.compile(r"^[^A-Z]+")
+LEGAL_SUFFIX = re.compile(r"\b(CORP(?:ORATION)?|INC\.?|CO\.?|COMPANY|LTD\.?|CORPORATION)\b")
 BREAK_PAT = re.compile(
     r"\b(branch|tin|vat|address|add\.?|tel|contact|phone|no\.?|receipt|invoice|official|cashier|terminal|store no\.?)\b",
     re.IGNORECASE,
@@ -73,7 +118,7 @@ def _sanitize_ocr(s: str) -> str:
     # Common ELEVEN misspellings from OCR
     u = u.replace("ELEWEM", "ELEVEN").replace("ELEWEOD", "ELEVEN").replace("ELEWEN", "ELEVEN").replace("ELEVENN", "ELEVEN")
     # Sometimes hyphen lost or repeated
-    u = re.sub(r"\b7\s*ELEVEN\b", "7-ELEVEN", u)
+    u = SEVEN_ELEVEN.sub("7-ELEVEN", u)
 
     # Collapse spaces
     u = SPACES.sub(" ", u).strip()
@@ -110,14 +155,19 @@ def _apply_char_map(u: str) -> str:
 def _normalize_for_match(s: str) -> str:
     s = _sanitize_ocr(s)
     s = _apply_char_map(s)
-    s = re.sub(r"[^A-Z0-9]", "", s)
+    s = NON_ALNUM.sub("", s)
     # Trim leading non-alpha that might survive
-    s = re.sub(r"^[^A-Z]+", "", s)
+    s = LEADING_NON_ALPHA.sub("", s)
     return s
 
 def normalize_store_name(store: Optional[str]) -> Optional[str]:
     if not store:
         return None
+    # _sanitize_ocr uppercases and trims first, so that is a safe cache key
+    return _normalize_store_cached(store.strip().upper())
+
+@lru_cache(maxsize=4096)
+def _normalize_store_cached(store: str) -> str:
     s = _sanitize_ocr(store)
     # Only keep the first line if multi-line header came through
     if "\n" in s:
@@ -127,8 +177,8 @@ def normalize_store_name(store: Optional[str]) -> Optional[str]:
     if match:
         s = s[:match.start()]
     # Remove legal suffixes
-    s = re.sub(r"\b(CORP(?:ORATION)?|INC\.?|CO\.?|COMPANY|LTD\.?|CORPORATION)\b", "", s)
-    s = re.sub(r"\s{2,}", " ", s).strip()
+    s = LEGAL_SUFFIX.sub("", s)
+    s = MULTI_SPACES.sub(" ", s).strip()
     return s
 
 # ================= Fuzzy snapping to canonical brand =================
@@ -138,10 +188,11 @@ def _distance(a: str, b: str) -> int:
 def _sequence_ratio(a: str, b: str) -> float:
     if not a or not b:
         return 0.0
-    return difflib.SequenceMatcher(None, a, b).ratio()
+    return fuzz.ratio(a, b) / 100.0
 
 
 def _partial_ratio(a: str, b: str) -> float:
+    """Best ratio of the shorter string against same-length windows of the longer one."""
     if not a or not b:
         return 0.0
     if len(a) > len(b):
@@ -149,21 +200,17 @@ def _partial_ratio(a: str, b: str) -> float:
     best = 0.0
     span = len(a)
     for i in range(0, len(b) - span + 1):
-        window = b[i : i + span]
-        best = max(best, difflib.SequenceMatcher(None, a, window).ratio())
+        best = max(best, fuzz.ratio(a, b[i : i + span]) / 100.0)
         if best >= 0.995:  # early exit if essentially perfect
             break
     return best
 
 
-def _similarity_score(norm: str, candidate: str) -> float:
+def _similarity_score(norm_clean: str, cand_clean: str) -> float:
     """
-    Combined score that considers raw and sanitized strings.
+    Combined score of two strings already passed through _normalize_for_match.
     Returns value in [0,1].
     """
-    norm_clean = _normalize_for_match(norm)
-    cand_clean = _normalize_for_match(candidate)
-
     if not norm_clean or not cand_clean:
         return 0.0
 
@@ -183,25 +230,69 @@ def _similarity_score(norm: str, candidate: str) -> float:
     return min(1.0, base + prefix_bonus)
 
 
-@lru_cache(maxsize=1)
-def _all_brands_cached() -> tuple[str, ...]:
-    brands: list[str] = []
-    for _, bset, _ in ALL_SETS:
-        brands.extend(list(bset))
-    return tuple(brands)
+# (brand, normalized brand, char counts) built once; brands never change at runtime
+_BRANDS_NORM: tuple[tuple[str, str, Counter], ...] = tuple(
+    (b, n, Counter(n)) for b, n in ((b, _normalize_for_match(b)) for b in _BRAND_CATEGORY)
+)
 
 
-def _best_match(norm: str, candidates: Iterable[str]) -> tuple[Optional[str], float]:
+def _score_upper_bound(q_clean: str, q_counts: Counter, c_clean: str, c_counts: Counter) -> float:
     """
-    Return (best_brand, score) where score is normalized similarity in [0,1],
-    using 1 - distance/len(max(a,b)).
+    Cheap ceiling on _similarity_score. Every component (edit distance, ratio,
+    best window) is limited by the characters the two strings share, at most
+    shared/len(shorter); the prefix bonus adds 0.05.
+    """
+    shorter = min(len(q_clean), len(c_clean))
+    if not shorter:
+        return 0.0
+    if len(q_counts) > len(c_counts):
+        q_counts, c_counts = c_counts, q_counts
+    shared = sum(min(n, c_counts[ch]) for ch, n in q_counts.items() if ch in c_counts)
+    return shared / shorter + 0.05 + 1e-9
+
+
+def _contained_brand(norm: str) -> Optional[tuple[str, str]]:
+    """Alias or brand found verbatim inside norm, as (canonical, category)."""
+    if _AUTOMATON is not None:
+        alias = brand = None
+        for _, (kind, _, cat, word) in _AUTOMATON.iter(norm):
+            if kind == "alias":
+                alias = (word, cat)
+                break
+            if kind == "brand" and (brand is None or len(word) > len(brand[0])):
+                brand = (word, cat)
+        return alias or brand
+
+    for alias, canonical in ALIAS_MAP.items():
+        if alias in norm and canonical in _BRAND_CATEGORY:
+            return canonical, _BRAND_CATEGORY[canonical]
+    hits = [b for b in _BRAND_CATEGORY if b in norm]
+    if hits:
+        b = max(hits, key=len)
+        return b, _BRAND_CATEGORY[b]
+    return None
+
+
+def _best_match(
+    norm: str, candidates: Iterable[tuple[str, str, Counter]] = _BRANDS_NORM, cutoff: float = 0.0
+) -> tuple[Optional[str], float]:
+    """
+    Return (best_brand, score) where score is normalized similarity in [0,1].
+    candidates are _BRANDS_NORM-style tuples; norm is normalized once here.
+    Brands whose score ceiling is below cutoff (or can't beat the current best)
+    are skipped without running the edit-distance kernels.
     """
     if not norm:
         return None, 0.0
+    norm_clean = _normalize_for_match(norm)
+    norm_counts = Counter(norm_clean)
     best = None
     best_score = 0.0
-    for c in candidates:
-        score = _similarity_score(norm, c)
+    for c, c_clean, c_counts in candidates:
+        ceiling = _score_upper_bound(norm_clean, norm_counts, c_clean, c_counts)
+        if ceiling < cutoff or ceiling <= best_score:
+            continue
+        score = _similarity_score(norm_clean, c_clean)
         if score > best_score:
             best, best_score = c, score
     return best, best_score
@@ -213,51 +304,63 @@ def correct_store_name(store: Optional[str]) -> tuple[Optional[str], Optional[st
     """
     if not store:
         return None, None, None
+    # Headers repeat a lot ("JOLLIBEE", "7-ELEVEN"); results are immutable tuples
+    return _correct_store_name_cached(store.strip().upper())
 
+@lru_cache(maxsize=4096)
+def _correct_store_name_cached(store: str) -> tuple[Optional[str], Optional[str], Optional[float]]:
     norm = normalize_store_name(store)
     if not norm:
         return None, None, None
 
-    # Direct alias map check (handles legal names like "Golden Arches Food Corporation")
-    for alias, canonical in ALIAS_MAP.items():
-        if alias in norm.upper():
-            for cat, brands, _ in ALL_SETS:
-                if canonical in brands:
-                    return canonical, cat, 1.0
-
-    # 1) Exact/contains quick pass
-    for cat, brands, _ in ALL_SETS:
-        for b in brands:
-            if b in norm or norm in b:
-                return b, cat, 1.0
+    # 1) Alias (legal names like "Golden Arches Food Corporation") or brand
+    #    contained in the header; one automaton scan when pyahocorasick is present
+    hit = _contained_brand(norm.upper())
+    if hit:
+        return hit[0], hit[1], 1.0
+    # Header is a fragment of a brand ("MERCURY" -> "MERCURY DRUG")
+    for b, cat in _BRAND_CATEGORY.items():
+        if norm in b:
+            return b, cat, 1.0
 
     # 2) Fuzzy against all brands
-    best, score = _best_match(norm, _all_brands_cached())
-
     # Confidence threshold:
     # - Short strings are tricky; require higher similarity
     # - For typical brand lengths (~6-12), 0.82-0.88 works well
     min_required = 0.84
+    best, score = _best_match(norm, cutoff=min_required)
+
     if score >= min_required and best:
-        # Map brand to category
-        for cat, brands, _ in ALL_SETS:
-            if best in brands:
-                return best, cat, score
+        return best, _BRAND_CATEGORY[best], score
 
     return None, None, score if best else None
 
 # ================= Keyword-only fallback =================
+# One alternation per category, checked in priority order (first hit wins)
+_KEYWORD_RES = [
+    (cat, re.compile("|".join(re.escape(k) for k in sorted(kws, key=len, reverse=True))))
+    for cat, kws in (
+        ("Utilities", UTILITY_KW),
+        ("Transportation", TRANSPORT_KW),
+        ("Health & Wellness", HEALTH_KW),
+        ("Groceries", GROCERY_KW),
+        ("Food", FOOD_KW),
+    )
+]
+
 def _keyword_match(text_low: str) -> Optional[str]:
-    if any(k in text_low for k in UTILITY_KW):
-        return "Utilities"
-    if any(k in text_low for k in TRANSPORT_KW):
-        return "Transportation"
-    if any(k in text_low for k in HEALTH_KW):
-        return "Health & Wellness"
-    if any(k in text_low for k in GROCERY_KW):
-        return "Groceries"
-    if any(k in text_low for k in FOOD_KW):
-        return "Food"
+    if _AUTOMATON is not None:
+        best = None
+        for _, (kind, prio, cat, _) in _AUTOMATON.iter(text_low):
+            if kind == "kw" and (best is None or prio < best[0]):
+                best = (prio, cat)
+                if prio == 0:
+                    break
+        return best[1] if best else None
+
+    for cat, pat in _KEYWORD_RES:
+        if pat.search(text_low):
+            return cat
     return None
 
 # ================= Public API =================
@@ -1,10 +1,31 @@
+"""
+Debug CLI for the category model: `python -m app.predict < receipt.txt`.
+
+The API keeps both models loaded for the process lifetime (see api._ml_predict and
+POST /classify_text); this script is only for checking a model file by hand. predict()
+can be imported too and loads the models once per process.
+"""
 import sys
+from functools import lru_cache
 from joblib import load
 from pathlib import Path
 
 MODELS = Path(__file__).resolve().parents[1]/"models"
-vec = load(MODELS/"vectorizer.joblib")
-clf = load(MODELS/"classifier.joblib")
 
-text = sys.stdin.read()
-print(clf.predict(vec.transform([text]))[0])
+
+@lru_cache(maxsize=1)
+def _models():
+    # Nothing here updates the models, so both can be memory-mapped: repeat runs
+    # page the arrays in from the OS cache instead of copying them into the heap.
+    vec = load(MODELS/"vectorizer.joblib", mmap_mode="r")
+    clf = load(MODELS/"classifier.joblib", mmap_mode="r")
+    return vec, clf
+
+
+def predict(text: str) -> str:
+    vec, clf = _models()
+    return clf.predict(vec.transform([text]))[0]
+
+
+if __name__ == "__main__":
+    print(predict(sys.stdin.read()))
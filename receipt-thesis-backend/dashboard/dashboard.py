@@ -6,9 +6,11 @@ st.title("Receipt Dashboard")
 DATA = Path(__file__).resolve().parents[1]/"data"
 parsed = DATA/"parsed_fields.csv"
 if parsed.exists():
-    df = pd.read_csv(parsed)
-    st.dataframe(df[["id","store","date","total"]].head(100))
-    if "category" in df:
-        st.bar_chart(df["category"].value_counts())
+    # Read only what is shown: the header, the first 100 rows of the table columns,
+    # and the category column on its own for the chart.
+    columns = pd.read_csv(parsed, nrows=0).columns
+    st.dataframe(pd.read_csv(parsed, usecols=["id","store","date","total"], nrows=100))
+    if "category" in columns:
+        st.bar_chart(pd.read_csv(parsed, usecols=["category"])["category"].value_counts())
 else:
     st.info("No parsed_fields.csv yet. Run train/build_dataset.py")
@@ -16,12 +16,19 @@ import asyncio
 import logging
 import os
 import time
-from typing import Tuple
+from typing import Optional, Tuple
 
 import httpx
 import psycopg2
 from dotenv import load_dotenv
 
+try:  # optional: HTTP/2 for the auth health check (httpx[http2])
+    import h2  # type: ignore  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:  # pragma: no cover - optional dependency
+    _HTTP2 = False
+
 load_dotenv()
 
 
@@ -67,16 +74,64 @@ async def ping_auth(client: httpx.AsyncClient) -> Tuple[bool, str]:
         return False, repr(exc)
 
 
+# One long-lived connection: each ping is a single round trip instead of a new
+# TCP + TLS + auth handshake (and a fresh Supabase connection slot) every interval.
+_db_conn: Optional["psycopg2.extensions.connection"] = None
+
+
+def _connect_db() -> "psycopg2.extensions.connection":
+    global _db_conn
+    # connect_timeout only covers the handshake. On the reused socket, tcp_user_timeout and
+    # keepalives make a silently dropped connection (NAT / pooler idle cut) error out
+    # within the ping timeout instead of after minutes of kernel retransmits.
+    _db_conn = psycopg2.connect(
+        DB_DSN,
+        connect_timeout=DEFAULT_TIMEOUT,
+        tcp_user_timeout=DEFAULT_TIMEOUT * 1000,  # ms
+        keepalives=1,
+        keepalives_idle=30,
+        keepalives_interval=max(1, DEFAULT_TIMEOUT // 3),
+        keepalives_count=3,
+    )
+    _db_conn.autocommit = True
+    return _db_conn
+
+
+def _close_db() -> None:
+    global _db_conn
+    if _db_conn is not None:
+        try:
+            _db_conn.close()
+        except Exception:
+            pass
+    _db_conn = None
+
+
+def _select_one(conn: "psycopg2.extensions.connection") -> Tuple[bool, str]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1;")
+        cur.fetchone()
+    return True, "SELECT 1 ok"
+
+
 def _ping_db_sync() -> Tuple[bool, str]:
     if not DB_DSN:
         return False, "SUPABASE_DB_URL not set"
+    reused = _db_conn is not None and not _db_conn.closed
+    try:
+        return _select_one(_db_conn if reused else _connect_db())
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as exc:
+        _close_db()
+        if not reused:
+            return False, repr(exc)
+    except Exception as exc:
+        _close_db()
+        return False, repr(exc)
+    # The idle connection was dropped server-side (e.g. pooler idle timeout): reconnect once
     try:
-        with psycopg2.connect(DB_DSN, connect_timeout=DEFAULT_TIMEOUT) as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1;")
-                cur.fetchone()
-        return True, "SELECT 1 ok"
+        return _select_one(_connect_db())
     except Exception as exc:
+        _close_db()
         return False, repr(exc)
 
 
@@ -85,11 +140,17 @@ async def ping_db() -> Tuple[bool, str]:
 
 
 async def cycle(interval: int, once: bool = False) -> None:
-    async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+    async with httpx.AsyncClient(
+        timeout=DEFAULT_TIMEOUT,
+        http2=_HTTP2,
+        limits=httpx.Limits(max_keepalive_connections=1),
+    ) as client:
         while True:
             started = time.strftime("%Y-%m-%d %H:%M:%S")
-            auth_ok, auth_msg = await ping_auth(client)
-            db_ok, db_msg = await ping_db()
+            # Independent round trips: a cycle takes max(auth, db), not the sum
+            (auth_ok, auth_msg), (db_ok, db_msg) = await asyncio.gather(
+                ping_auth(client), ping_db()
+            )
             logging.info(
                 "[%s] auth:%s (%s) | db:%s (%s)",
                 started,
@@ -134,6 +195,8 @@ def main() -> None:
         asyncio.run(cycle(interval, once=args.once))
     except KeyboardInterrupt:
         logging.info("Stopped by user.")
+    finally:
+        _close_db()
 
 
 if __name__ == "__main__":
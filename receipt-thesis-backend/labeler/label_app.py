@@ -1,26 +1,69 @@
+import csv
 import streamlit as st
 import pandas as pd
 from pathlib import Path
 
 CATS = ["Utilities","Food","Transportation","Health & Wellness","Groceries","Others"]
+CAT_IDX = {c: i for i, c in enumerate(CATS)}
 
 st.title("Receipt Labeler")
 DATA = Path(__file__).resolve().parents[1]/"data"
-ocr = pd.read_csv(DATA/"parsed_fields.csv") if (DATA/"parsed_fields.csv").exists() else pd.read_csv(DATA/"ocr_raw.csv")
+
+
+@st.cache_data
+def _load_ocr(path: Path, mtime_ns: int) -> pd.DataFrame:
+    # Cached across reruns; mtime_ns is only part of the key so a rebuilt CSV is re-read.
+    return pd.read_csv(
+        path,
+        usecols=lambda c: c in {"id", "text", "store", "date", "total"},
+        dtype={"id": str, "text": str, "store": str, "date": str},
+    )
+
+
+ocr_path = DATA/"parsed_fields.csv" if (DATA/"parsed_fields.csv").exists() else DATA/"ocr_raw.csv"
+ocr = _load_ocr(ocr_path, ocr_path.stat().st_mtime_ns)
 labels_path = DATA/"labels.csv"
-labels = pd.read_csv(labels_path) if labels_path.exists() else pd.DataFrame(columns=["id","label"])
-lab_map = dict(zip(labels.id.astype(str), labels.label))
 
-for i, row in ocr.iterrows():
-    rid = str(row.get("id", i))
+
+def _labels_mtime() -> int:
+    return labels_path.stat().st_mtime_ns if labels_path.exists() else 0
+
+
+# labels.csv is append-only (one row per Save); the last row for an id wins.
+# Reruns reuse the session's map; it is re-read only when the file changed
+# underneath us (e.g. another labeler session saved).
+labels_mtime = _labels_mtime()
+if st.session_state.get("lab_mtime") != labels_mtime:
+    labels = pd.read_csv(labels_path, dtype={"id": str}) if labels_path.exists() else pd.DataFrame(columns=["id","label"])
+    labels = labels.drop_duplicates("id", keep="last")
+    st.session_state.lab_map = dict(zip(labels["id"].astype(str).to_numpy(), labels["label"].to_numpy()))
+    st.session_state.lab_mtime = labels_mtime
+lab_map = st.session_state.lab_map
+
+# Streamlit reruns this loop on every widget interaction: itertuples yields plain
+# namedtuples instead of building a pd.Series per row like iterrows did.
+# Only one page of widgets is built per rerun.
+PAGE_SIZE = 25
+ids = (ocr["id"].astype(str) if "id" in ocr else ocr.index.astype(str)).to_numpy()
+last_page = max(len(ocr) - 1, 0) // PAGE_SIZE
+page = st.number_input(f"Page (0-{last_page})", min_value=0, max_value=last_page, value=0, step=1)
+lo, hi = int(page) * PAGE_SIZE, (int(page) + 1) * PAGE_SIZE
+for rid, row in zip(ids[lo:hi], ocr.iloc[lo:hi].itertuples(index=False, name="Row")):
     st.subheader(rid)
     with st.expander("OCR Text"):
-        st.text(row.get("text", ""))
-    st.write({"store": row.get("store"), "total": row.get("total"), "date": row.get("date")})
-    cur = lab_map.get(rid, "Others")
-    choice = st.radio("Label", CATS, index=CATS.index(cur), key=f"lab_{rid}")
+        st.text(getattr(row, "text", ""))
+    st.write({"store": getattr(row, "store", None), "total": getattr(row, "total", None), "date": getattr(row, "date", None)})
+    # unknown labels in labels.csv fall back to Others instead of raising
+    cur_idx = CAT_IDX.get(lab_map.get(rid), CAT_IDX["Others"])
+    choice = st.radio("Label", CATS, index=cur_idx, key=f"lab_{rid}")
     if st.button("Save", key=f"save_{rid}"):
         lab_map[rid] = choice
-        out = pd.DataFrame({"id": list(lab_map.keys()), "label": list(lab_map.values())})
-        out.to_csv(labels_path, index=False)
+        new_file = not labels_path.exists()
+        with open(labels_path, "a", newline="") as f:
+            w = csv.writer(f)
+            if new_file:
+                w.writerow(["id", "label"])
+            w.writerow([rid, choice])
+        # our own append is already in lab_map, so don't reload for it
+        st.session_state.lab_mtime = _labels_mtime()
         st.success("Saved!")
@@ -1,39 +1,60 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from pathlib import Path
 from tqdm import tqdm
 from app.ocr import ocr_image_path
-from app.parser import parse_fields
+from app.parser import parse_fields_batch
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA = ROOT/"data"
 RAW = DATA/"raw_images"
 DATA.mkdir(exist_ok=True, parents=True)
+EXTS = {".png", ".jpg", ".jpeg", ".tif", ".webp", ".bmp"}
+# Images in flight at once. Tesseract itself is capped process-wide by
+# TESSERACT_THREADS (app.ocr's shared pool), so extra workers only keep that pool
+# busy while other images are being decoded and preprocessed.
+OCR_WORKERS = max(1, int(os.getenv("BUILD_OCR_WORKERS", str(os.cpu_count() or 4))))
+# Re-OCR everything, ignoring the cache (e.g. after changing the OCR pipeline)
+OCR_FRESH = os.getenv("BUILD_OCR_FRESH", "false").lower() == "true"
+OCR_RAW = DATA/"ocr_raw.csv"
+# id -> [mtime_ns, size] of the image each ocr_raw.csv row was made from
+OCR_CACHE = DATA/"ocr_cache.json"
 
-# 1) OCR all images
-rows = []
-for p in tqdm(sorted(RAW.glob("*"))):
-    if p.suffix.lower() not in {".png", ".jpg", ".jpeg", ".tif", ".webp", ".bmp"}:
-        continue
-    rec = ocr_image_path(str(p))
-    rec["id"] = p.stem
-    rows.append(rec)
+# 1) OCR all images (only new or changed ones when ocr_raw.csv is up to date)
+paths = [p for p in sorted(RAW.glob("*")) if p.suffix.lower() in EXTS]
+stamps = {p.stem: [p.stat().st_mtime_ns, p.stat().st_size] for p in paths}
+cached: dict = {}
+if not OCR_FRESH and OCR_CACHE.exists() and OCR_RAW.exists():
+    seen = json.loads(OCR_CACHE.read_text())
+    prev = pd.read_csv(OCR_RAW, dtype={"id": str})
+    cached = {rec["id"]: rec for rec in prev.to_dict("records") if seen.get(rec["id"]) == stamps.get(rec["id"])}
+todo = [p for p in paths if p.stem not in cached]
+print(f"OCR: {len(todo)} new/changed, {len(paths) - len(todo)} cached")
+
+fresh = {}
+with ThreadPoolExecutor(max_workers=OCR_WORKERS) as ex:
+    for p, rec in zip(todo, tqdm(ex.map(ocr_image_path, map(str, todo)), total=len(todo))):
+        rec["id"] = p.stem
+        fresh[p.stem] = rec
+# Same sorted file order as a full run
+rows = [fresh.get(p.stem) or cached[p.stem] for p in paths]
 
 ocr = pd.DataFrame(rows)
-ocr.to_csv(DATA/"ocr_raw.csv", index=False)
+ocr.to_csv(OCR_RAW, index=False)
+OCR_CACHE.write_text(json.dumps({p.stem: stamps[p.stem] for p in paths}))
 
 # 2) Parse fields
-stores, totals, dates = [], [], []
-for t in ocr.text.fillna(""):
-    s, tot, d = parse_fields(t)
-    stores.append(s); totals.append(tot); dates.append(d)
-ocr["store"], ocr["total"], ocr["date"] = stores, totals, dates
+ocr["store"], ocr["total"], ocr["date"] = parse_fields_batch(ocr.text.fillna(""))
 ocr.to_csv(DATA/"parsed_fields.csv", index=False)
 print("Wrote parsed_fields.csv")
 
 # 3) Merge with labels (if exists) to make dataset
 labels_path = DATA/"labels.csv"
 if labels_path.exists():
-    labels = pd.read_csv(labels_path)
+    # The labeler appends one row per Save; keep each id's latest label
+    labels = pd.read_csv(labels_path).drop_duplicates("id", keep="last")
     merged = ocr.merge(labels, on="id")
     merged[["id","text","label"]].to_csv(DATA/"dataset.csv", index=False)
     print("Wrote dataset.csv")
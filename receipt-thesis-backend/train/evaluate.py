@@ -1,6 +1,8 @@
 from pathlib import Path
 import pandas as pd
+from text_features import build_text  # sibling module (run as python train/<script>.py)
 from joblib import load
+from sklearn.pipeline import make_pipeline
 from sklearn.metrics import classification_report, confusion_matrix, f1_score
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -12,26 +14,16 @@ CAT_SET = set(CATS)
 
 csv_path = DATA / "dataset.csv"
 assert csv_path.exists(), f"dataset.csv not found at {csv_path}"
-df = pd.read_csv(csv_path)
-
-# Build text like in train.py (must be consistent!)
-def make_text(row):
-    parts = []
-    for col in ("text", "store", "date"):
-        if col in row and pd.notna(row[col]):
-            parts.append(str(row[col]))
-    if "total" in row and pd.notna(row["total"]):
-        try:
-            amt = float(row["total"])
-            parts.append(f"TOTALPHP_{int(round(amt))}")
-        except Exception:
-            pass
-    return " ".join(parts).strip()
-
-if "text" in df.columns:
-    X_text = df.apply(lambda r: make_text(r), axis=1)
-else:
-    X_text = df.apply(lambda r: make_text(r), axis=1)
+# Only the columns build_text and the label step read; string columns typed up front
+# so pandas skips inference (and ids/dates never get coerced)
+df = pd.read_csv(
+    csv_path,
+    usecols=lambda c: c in {"text", "store", "date", "total", "label", "category"},
+    dtype={"text": str, "store": str, "date": str, "label": str, "category": str},
+)
+
+# Build text like in train.py (shared helper keeps them consistent)
+X_text = build_text(df)
 
 if "label" in df.columns:
     y = df["label"].fillna("Others").astype(str)
@@ -40,19 +32,20 @@ elif "category" in df.columns:
 else:
     raise ValueError("No 'label' or 'category' column found in dataset.csv")
 
-y = y.apply(lambda c: c if c in CAT_SET else "Others")
+y = y.where(y.isin(CAT_SET), "Others")
 
 # Drop empties
 mask_nonempty = X_text.str.len() > 0
 X_text = X_text[mask_nonempty]
 y = y[mask_nonempty]
 
-# Load models
-vec = load(MODELS / "vectorizer.joblib")
-clf = load(MODELS / "classifier.joblib")
-
-X = vec.transform(X_text)
-y_pred = clf.predict(X)
+# Load models (read-only here, so memory-map like app/predict.py). They stay separate
+# artifacts: the API mmaps the vectorizer and updates classifier.joblib in place.
+pipe = make_pipeline(
+    load(MODELS / "vectorizer.joblib", mmap_mode="r"),
+    load(MODELS / "classifier.joblib", mmap_mode="r"),
+)
+y_pred = pipe.predict(X_text)
 
 print("\n=== Full-dataset evaluation ===")
 print(classification_report(y, y_pred, labels=CATS, digits=3))
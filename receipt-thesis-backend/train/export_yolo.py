@@ -0,0 +1,40 @@
+"""
+Export models/yolo_receipt.pt for faster inference. app/detect.py picks the result up
+automatically (yolo_receipt.engine on CUDA hosts, then yolo_receipt.onnx, then the .pt).
+
+  python train/export_yolo.py          # TensorRT FP16 engine (NVIDIA GPU + TensorRT)
+  python train/export_yolo.py int8     # TensorRT INT8, calibrated on yolo_data images
+  python train/export_yolo.py onnx     # ONNX (CPU / onnxruntime hosts)
+
+Export at the same imgsz the API predicts with (1280); TensorRT engines are fixed-size
+and tied to the GPU + TensorRT version they were built on. Exports also have a fixed
+input batch of 1, so the API's YOLO micro-batches run them one image per predict call.
+"""
+import sys
+from pathlib import Path
+from ultralytics import YOLO
+
+ROOT = Path(__file__).resolve().parents[1]
+MODELS = ROOT / "models"
+WEIGHTS = MODELS / "yolo_receipt.pt"
+DATA_YAML = ROOT / "yolo_data" / "data.yaml"
+IMGSZ = 1280
+
+mode = sys.argv[1] if len(sys.argv) > 1 else "fp16"
+assert WEIGHTS.exists(), f"weights not found at {WEIGHTS}"
+model = YOLO(str(WEIGHTS))
+
+if mode == "fp16":
+    out = model.export(format="engine", half=True, imgsz=IMGSZ, device=0)
+elif mode == "int8":
+    # Post-training quantization: ~100 calibration images are plenty for 3 box classes
+    out = model.export(
+        format="engine", int8=True, imgsz=IMGSZ, device=0,
+        data=str(DATA_YAML), fraction=0.1,
+    )
+elif mode == "onnx":
+    out = model.export(format="onnx", imgsz=IMGSZ, simplify=True)
+else:
+    raise SystemExit(f"unknown mode {mode!r} (use fp16, int8 or onnx)")
+
+print("exported:", out)
@@ -0,0 +1,35 @@
+"""Model input text shared by train.py and evaluate.py (they must build it identically)."""
+import numpy as np
+import pandas as pd
+
+
+def _present(df: pd.DataFrame, col: str) -> pd.Series:
+    """Column as strings, NaN where missing (or all-NaN if the column is absent)."""
+    if col not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype=object)
+    s = df[col]
+    return s.astype(str).where(s.notna())
+
+
+def build_text(df: pd.DataFrame) -> pd.Series:
+    """
+    text, store and date joined by single spaces, plus a TOTALPHP_<rounded total>
+    token to help the model learn price patterns. Missing parts are skipped.
+    Column-wise string ops instead of a per-row apply.
+    """
+    parts = [_present(df, col) for col in ("text", "store", "date")]
+    if "total" in df.columns:
+        amt = pd.to_numeric(df["total"], errors="coerce")
+        ok = np.isfinite(amt)
+        # np.round rounds half to even, like round() did per row
+        ints = np.round(amt.where(ok, 0)).astype(np.int64)
+        # totals repeat a lot: format each distinct value once, then gather
+        codes, uniq = pd.factorize(ints)
+        toks = ("TOTALPHP_" + pd.Index(uniq).astype(str)).to_numpy()
+        parts.append(pd.Series(toks[codes], index=df.index).where(ok))
+
+    out = parts[0]
+    for p in parts[1:]:
+        # "a b" where both exist, otherwise whichever one does
+        out = out.str.cat(p, sep=" ").fillna(out).fillna(p)
+    return out.fillna("").str.strip()
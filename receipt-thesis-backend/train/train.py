@@ -3,6 +3,7 @@ warnings.filterwarnings("ignore")
 
 from pathlib import Path
 import pandas as pd
+from text_features import build_text  # sibling module (run as python train/<script>.py)
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import SGDClassifier
@@ -24,28 +25,17 @@ CAT_SET = set(CATS)
 # Load dataset
 csv_path = DATA / "dataset.csv"
 assert csv_path.exists(), f"dataset.csv not found at {csv_path}"
-df = pd.read_csv(csv_path)
+# Only the columns build_text and the label step read; string columns typed up front
+# so pandas skips inference (and ids/dates never get coerced)
+df = pd.read_csv(
+    csv_path,
+    usecols=lambda c: c in {"text", "store", "date", "total", "label", "category"},
+    dtype={"text": str, "store": str, "date": str, "label": str, "category": str},
+)
 
 # -------- Build text feature robustly --------
-# Prefer 'text' column if present; otherwise synthesize from other fields
-def make_text(row):
-    parts = []
-    for col in ("text", "store", "date"):
-        if col in row and pd.notna(row[col]):
-            parts.append(str(row[col]))
-    # Add total as a token to help the model learn price patterns
-    if "total" in row and pd.notna(row["total"]):
-        try:
-            amt = float(row["total"])
-            parts.append(f"TOTALPHP_{int(round(amt))}")
-        except Exception:
-            pass
-    return " ".join(parts).strip()
-
-if "text" in df.columns:
-    X_text = df.apply(lambda r: make_text(r), axis=1)
-else:
-    X_text = df.apply(lambda r: make_text(r), axis=1)
+# text + store + date + total token; absent columns are skipped (see text_features.py)
+X_text = build_text(df)
 
 # Clean labels and map unknowns to Others
 if "label" in df.columns:
@@ -55,16 +45,17 @@ elif "category" in df.columns:
 else:
     raise ValueError("No 'label' or 'category' column found in dataset.csv")
 
-y = y.apply(lambda c: c if c in CAT_SET else "Others")
+y = y.where(y.isin(CAT_SET), "Others")
 
 # Drop empties
 mask_nonempty = X_text.str.len() > 0
 X_text = X_text[mask_nonempty]
 y = y[mask_nonempty]
 
-# Train / test split
+# Train / test split. Stratify on integer codes in sorted-label order: the same
+# split sklearn derives from the strings, without np.unique sorting objects.
 X_train, X_test, y_train, y_test = train_test_split(
-    X_text, y, test_size=0.2, stratify=y, random_state=42
+    X_text, y, test_size=0.2, stratify=pd.factorize(y, sort=True)[0], random_state=42
 )
 
 # Vectorizer + Classifier
@@ -72,7 +63,8 @@ vec = TfidfVectorizer(
     lowercase=True,
     ngram_range=(1, 2),
     min_df=2,            # adjust smaller if your dataset is tiny
-    max_df=0.95
+    max_df=0.95,
+    sublinear_tf=True,   # 1+log(tf): repeated item lines don't swamp the store/keyword terms
 )
 
 Xtr = vec.fit_transform(X_train)
@@ -107,5 +99,7 @@ print(confusion_matrix(y_test, y_pred, labels=CATS))
 
 # Save artifacts compatible with your API
 dump(vec, MODELS / "vectorizer.joblib")
+# Fortran order makes coef_.T C-contiguous, so sparse X @ coef_.T skips a full copy per predict
+clf.coef_ = np.asfortranarray(clf.coef_)
 dump(clf, MODELS / "classifier.joblib")
 print("\nSaved models/vectorizer.joblib and models/classifier.joblib")